@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from utils import metrics
+from utils.cache import LocalTTLCache
+
+SESSION_KEY_PREFIX = "auth:session:"
+USER_KEY_PREFIX = "auth:user:"
+
+_local_sessions = LocalTTLCache(maxsize=settings.AUTH_CACHE_LOCAL_MAXSIZE, ttl=settings.AUTH_CACHE_LOCAL_TTL)
+_local_users = LocalTTLCache(maxsize=settings.AUTH_CACHE_LOCAL_MAXSIZE, ttl=settings.AUTH_CACHE_LOCAL_TTL)
+
+
+def _lookup(local: LocalTTLCache, key: str, group: str):
+    value = local.get(key)
+    if value is not None:
+        metrics.incr(f"{group}.local_hits")
+        return value
+
+    value = cache.get(key)
+    if value is not None:
+        metrics.incr(f"{group}.redis_hits")
+        local.set(key, value)
+        return value
+
+    metrics.incr(f"{group}.misses")
+    return None
+
+
+def get_session(session_key: str) -> Optional[Tuple[int, datetime]]:
+    """
+    Returns the cached session of a bearer token.
+
+    Args:
+        session_key (str): The session key sent as bearer token.
+
+    Returns:
+        Optional[Tuple[int, datetime]]: The user id and the expire date of the session,
+                                        or None when the session is not cached.
+    """
+    return _lookup(_local_sessions, f"{SESSION_KEY_PREFIX}{session_key}", "auth.session")
+
+
+def set_session(session_key: str, user_id: int, expire_date: datetime) -> None:
+    """
+    Caches a session until it expires, bounded by AUTH_CACHE_TTL.
+
+    Args:
+        session_key (str): The session key sent as bearer token.
+        user_id (int): The id of the authenticated user.
+        expire_date (datetime): When the session expires.
+    """
+    ttl = min(settings.AUTH_CACHE_TTL, int((expire_date - timezone.now()).total_seconds()))
+    if ttl <= 0:
+        return
+
+    key = f"{SESSION_KEY_PREFIX}{session_key}"
+    value = (int(user_id), expire_date)
+    cache.set(key, value, ttl)
+    _local_sessions.set(key, value, ttl)
+
+
+def delete_session(session_key: str) -> None:
+    """
+    Removes a session from the cache, used on logout and expiry.
+
+    Args:
+        session_key (str): The session key sent as bearer token.
+    """
+    key = f"{SESSION_KEY_PREFIX}{session_key}"
+    cache.delete(key)
+    _local_sessions.delete(key)
+
+
+def get_user(user_id: int):
+    """
+    Returns the cached active user.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        Optional[User]: The user, or None when it is not cached.
+    """
+    return _lookup(_local_users, f"{USER_KEY_PREFIX}{user_id}", "auth.user")
+
+
+def set_user(user) -> None:
+    """
+    Caches an active user for AUTH_CACHE_TTL seconds.
+
+    Args:
+        user (User): The user to cache.
+    """
+    key = f"{USER_KEY_PREFIX}{user.id}"
+    cache.set(key, user, settings.AUTH_CACHE_TTL)
+    _local_users.set(key, user)
+
+
+def delete_user(user_id: int) -> None:
+    """
+    Removes a user from the cache, used when the user is updated or deleted.
+
+    Other worker processes may keep serving it from their local cache for up to
+    AUTH_CACHE_LOCAL_TTL seconds.
+
+    Args:
+        user_id (int): The id of the user.
+    """
+    key = f"{USER_KEY_PREFIX}{user_id}"
+    cache.delete(key)
+    _local_users.delete(key)
@@ -1,3 +1,4 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.http import HttpRequest
 
 from django.contrib.auth import get_user_model
@@ -8,16 +9,62 @@ from django.contrib.sessions.models import Session
 from django.utils import timezone
 
 from django.contrib.auth import get_user_model
+from accounts import cache as auth_cache
+from accounts.tokens import is_signed_token, read_token, is_revoked
 
 _User = get_user_model()
 
 
+def _session_user_id(key: str) -> Optional[int]:
+    """
+    Resolves the user id of a DB-backed session, through the cache when possible.
+
+    Expired sessions are only rejected, ``accounts.tasks.session.clear_expired_sessions``
+    prunes them in the background.
+
+    Args:
+        key (str): The session key sent as bearer token.
+
+    Returns:
+        Optional[int]: The id of the session user, or None if the session is missing or expired.
+    """
+    cached_session = auth_cache.get_session(key)
+    if cached_session is None:
+        try:
+            session = Session.objects.get(session_key=key)
+        except Session.DoesNotExist:
+            return None
+
+        if session.expire_date < timezone.now():
+            return None
+
+        user_id = session.get_decoded().get("_auth_user_id")
+        if user_id is None:
+            return None
+
+        auth_cache.set_session(key, user_id, session.expire_date)
+        return user_id
+
+    user_id, expire_date = cached_session
+    if expire_date < timezone.now():
+        auth_cache.delete_session(key)
+
+        return None
+
+    return user_id
+
+
 def auth_access(request: HttpRequest) -> Optional[UnauthorizedResponse]:
     """
     Authenticates the access based on the HTTP Authorization header.
 
     This function checks the HTTP Authorization header in the request to
-    authenticate the user. It supports Bearer token authentication.
+    authenticate the user. It supports Bearer token authentication, the token
+    being either a session key or a signed token (see ``accounts.tokens``).
+
+    Signed tokens are checked with CPU only, sessions and users are resolved
+    through ``accounts.cache`` first, so a warm request authenticates without
+    touching the database.
 
     Args:
         request (HttpRequest): The HTTP request object containing the
@@ -39,22 +86,34 @@ def auth_access(request: HttpRequest) -> Optional[UnauthorizedResponse]:
     if type_access != "Bearer":
         return UnauthorizedResponse()
 
-    try:
-        session = Session.objects.get(session_key=key)
-    except Session.DoesNotExist:
-        return UnauthorizedResponse()
-
-    if session.expire_date < timezone.now():
-        session.delete()
-
-        return UnauthorizedResponse()
-
-    try:
-        user = _User.objects.get(
-            id=session.get_decoded()["_auth_user_id"],
-            is_active=True,
-        )
-    except _User.DoesNotExist:
+    request.auth_token = key
+    request.auth_payload = None
+
+    if is_signed_token(key):
+        payload = read_token(key)
+        if payload is None or is_revoked(payload):
+            return UnauthorizedResponse()
+
+        request.auth_payload = payload
+        user_id = payload["id"]
+    else:
+        user_id = _session_user_id(key)
+        if user_id is None:
+            return UnauthorizedResponse()
+
+    user = auth_cache.get_user(user_id)
+    if user is None:
+        try:
+            user = _User.objects.get(
+                id=user_id,
+                is_active=True,
+            )
+        except _User.DoesNotExist:
+            return UnauthorizedResponse()
+
+        auth_cache.set_user(user)
+
+    if request.auth_payload is not None and str(user.uid) != request.auth_payload["uid"]:
         return UnauthorizedResponse()
 
     request.user = user
@@ -66,6 +125,11 @@ def check_session_view(method: str) -> callable:
     Decorator that checks if the request method matches the specified method
     and if the user is authenticated.
 
+    Async views get an async wrapper, the authentication (cache and database
+    lookups) runs in a worker thread so the event loop is never blocked. The sync
+    ``prepare`` of the view, if any (see utils.conditional.conditional_view), runs in
+    the same thread hop right after it.
+
     Args:
         method (str): The allowed request method.
 
@@ -75,17 +139,40 @@ def check_session_view(method: str) -> callable:
     """
 
     def decorator(view):
-        def wrapper(request, *args, **kwargs):
-            if request.method != method:
-                return NotAllowedResponse(
-                    permitted_method=method,
-                )
-
-            error = auth_access(request)
-            if error is not None:
+        if iscoroutinefunction(view):
+            prepare = getattr(view, "prepare", None)
+
+            def authenticate(request, *args, **kwargs):
+                error = auth_access(request)
+                if error is None and prepare is not None:
+                    prepare(request, *args, **kwargs)
                 return error
 
-            return view(request, *args, **kwargs)
+            async def wrapper(request, *args, **kwargs):
+                if request.method != method:
+                    return NotAllowedResponse(
+                        permitted_method=method,
+                    )
+
+                error = await sync_to_async(authenticate)(request, *args, **kwargs)
+                if error is not None:
+                    return error
+
+                return await view(request, *args, **kwargs)
+
+        else:
+
+            def wrapper(request, *args, **kwargs):
+                if request.method != method:
+                    return NotAllowedResponse(
+                        permitted_method=method,
+                    )
+
+                error = auth_access(request)
+                if error is not None:
+                    return error
+
+                return view(request, *args, **kwargs)
 
         wrapper.csrf_exempt = True
 
@@ -0,0 +1 @@
+from .session import clear_expired_sessions
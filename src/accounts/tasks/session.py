@@ -0,0 +1,47 @@
+from typing import Optional
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+
+@shared_task
+def clear_expired_sessions(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> dict:
+    """
+    Deletes the expired sessions of django_session in bounded batches.
+
+    Each batch picks the oldest expired keys through the expire_date index and
+    deletes them in its own short statement, so the sweep never holds long locks
+    and never competes with the request path.
+
+    Args:
+        batch_size (int, optional): Sessions deleted per statement. Defaults to SESSION_SWEEP_BATCH_SIZE.
+        max_batches (int, optional): Stop after this many batches, None sweeps everything.
+
+    Returns:
+        dict: The number of deleted sessions and of executed batches.
+
+    Example:
+        >>> clear_expired_sessions(batch_size=1000)
+        {"deleted": 2500, "batches": 3}
+    """
+    batch_size = batch_size or settings.SESSION_SWEEP_BATCH_SIZE
+    now = timezone.now()
+    expired = Session.objects.filter(expire_date__lt=now)
+
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        keys = list(expired.order_by("expire_date").values_list("session_key", flat=True)[:batch_size])
+        if not keys:
+            break
+
+        count, _ = expired.filter(session_key__in=keys).delete()
+        deleted += count
+        batches += 1
+
+        if len(keys) < batch_size:
+            break
+
+    return {"deleted": deleted, "batches": batches}
@@ -1,3 +1,63 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django_redis.exceptions import ConnectionInterrupted
+
+from accounts import cache as auth_cache
+from accounts.tokens import DENYLIST_CACHE, issue_token
+
+_User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "auth": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "auth"},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class UserMeQueryCountTests(TestCase):
+    """
+    Queries run by user_me: the authentication loads the user once, then serves it from
+    accounts.cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        auth_cache._local_users.clear()
+        self.user = _User.objects.create_user(email="me@example.com")
+        self.client = Client(headers={"authorization": f"Bearer {issue_token(self.user)}"})
+
+    def test_user_me(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/accounts/me/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["email"], "me@example.com")
+
+        with self.assertNumQueries(0):
+            self.client.get("/api/v1/accounts/me/")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TokenRevocationTests(TestCase):
+    """
+    The Redis denylist of the signed tokens, see accounts.tokens.is_revoked.
+    """
+
+    def setUp(self):
+        cache.clear()
+        caches[DENYLIST_CACHE].clear()
+        self.user = _User.objects.create_user(email="me@example.com")
+        self.client = Client(headers={"authorization": f"Bearer {issue_token(self.user)}"})
+
+    def test_logged_out_token_is_rejected(self):
+        self.assertEqual(self.client.post("/api/v1/accounts/logout/").status_code, 200)
+        self.assertEqual(self.client.get("/api/v1/accounts/me/").status_code, 401)
+
+    def test_denylist_outage_fails_closed(self):
+        error = ConnectionInterrupted(connection=None)
+        with mock.patch.object(caches[DENYLIST_CACHE], "get_many", side_effect=error):
+            self.assertEqual(self.client.get("/api/v1/accounts/me/").status_code, 401)
+
+        self.assertEqual(self.client.get("/api/v1/accounts/me/").status_code, 200)
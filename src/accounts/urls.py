@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 
@@ -6,10 +7,14 @@ from accounts.views import (
     login,
     logout,
     user_me,
+    auser_me,
     update_user,
     delete_user,
 )
 
+if settings.API_ASYNC_VIEWS:
+    user_me = auser_me
+
 
 urlpatterns = [
     path("login/", login, name="login"),
@@ -1 +1 @@
-from .user import login, user_me, logout, create_user, update_user, delete_user
+from .user import login, user_me, auser_me, logout, create_user, update_user, delete_user
@@ -1,17 +1,23 @@
+from django.conf import settings
 from django.contrib.auth import logout as django_logout, authenticate, login as django_login
+from django.contrib.auth.signals import user_logged_in
 from django.db import IntegrityError
 from django.http import HttpRequest
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from orjson import loads, JSONDecodeError
+from orjson import dumps, loads, JSONDecodeError
 from pydantic import ValidationError
 from typing import Union
 from accounts.models import User
 from accounts.schemas.user import UserCreate, UserLogin, UserUpdate
 from accounts.decorators import check_session_view
+from accounts import cache as auth_cache
+from accounts.tokens import issue_token, revoke_token, revoke_user_tokens
+from django.contrib.sessions.models import Session
 
 from utils.response import JsonResponseBadRequest, JsonResponse
 from utils.tasks import create_periodic_task
+from utils.conditional import conditional_view, make_etag
 from events.models import Event
 from utils.tasks import create_periodic_task
 
@@ -56,20 +62,31 @@ def login(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequest]:
             }
         )
 
-    django_login(request, user)
-    request.session.save()
+    if settings.AUTH_TOKEN_MODE == "signed":
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
+        token = issue_token(user)
+    else:
+        django_login(request, user)
+        request.session.save()
+        token = request.session.session_key
 
     return JsonResponse(
         content={
             "success": True,
             "data": {
-                "token": request.session.session_key,
+                "token": token,
             },
         }
     )
 
 
+def _user_me_validators(request: HttpRequest):
+    # User has no updated_at, the ETag hashes the payload of the already loaded user
+    return make_etag(dumps(request.user.model_dump())), None
+
+
 @check_session_view("GET")
+@conditional_view(_user_me_validators)
 def user_me(request: HttpRequest) -> JsonResponse:
     return JsonResponse(
         content={
@@ -79,8 +96,28 @@ def user_me(request: HttpRequest) -> JsonResponse:
     )
 
 
+@check_session_view("GET")
+@conditional_view(_user_me_validators)
+async def auser_me(request: HttpRequest) -> JsonResponse:
+    """
+    Async version of user_me, served by core.asgi. The user was already resolved by
+    check_session_view, no query is run here.
+    """
+    return JsonResponse(
+        content={
+            "success": True,
+            "data": request.user.model_dump(),
+        }
+    )
+
+
 @check_session_view("POST")
 def logout(request: HttpRequest) -> JsonResponse:
+    if request.auth_payload is not None:
+        revoke_token(request.auth_payload)
+    else:
+        auth_cache.delete_session(request.auth_token)
+        Session.objects.filter(session_key=request.auth_token).delete()
     django_logout(request)
     return JsonResponse(
         content={"succes": True, "data": {"message": "Deslogado com sucesso!"}},
@@ -199,12 +236,13 @@ def update_user(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequ
         setattr(user, attr, value)
 
     user.save()
+    auth_cache.delete_user(user.id)
 
     return JsonResponse(
         content={
             "success": True,
             "data": {
-                "message": f"Usuario atualizado com sucesso!",
+                "message": "Usuario atualizado com sucesso!",
             },
         }
     )
@@ -225,6 +263,8 @@ def delete_user(request: HttpRequest) -> JsonResponse:
 
     user.is_active = False
     user.save()
+    auth_cache.delete_user(user.id)
+    revoke_user_tokens(user.id)
     return JsonResponse(
         content={
             "success": True,
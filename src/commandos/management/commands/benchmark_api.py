@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from threading import Lock
+from time import perf_counter
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = [
+    "/api/v1/events/list/?limit=10",
+    "/api/v1/subscriptions/list/?limit=10",
+    "/api/v1/accounts/me/",
+    "/api/v1/dashboards/?limit=10",
+]
+
+
+def percentile(latencies: list, rank: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    Args:
+        latencies (list): Sorted latencies, in seconds.
+        rank (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The latency at that rank, 0 for an empty list.
+    """
+    if not latencies:
+        return 0.0
+    index = max(0, min(len(latencies) - 1, round(rank / 100 * len(latencies)) - 1))
+    return latencies[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tests a running server (WSGI or ASGI) with concurrent GETs and reports "
+        "throughput and p50/p99 latency. Pin the server to the same CPUs for both runs, "
+        "see the bench-* targets of the Makefile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the server under test.")
+        parser.add_argument("--token", required=True, help="Bearer token sent on every request.")
+        parser.add_argument("--path", action="append", dest="paths", help="Path to request, repeatable.")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=30, help="Seconds the load lasts.")
+        parser.add_argument("--warmup", type=float, default=3, help="Seconds of load discarded before measuring.")
+        parser.add_argument("--timeout", type=float, default=10)
+
+    def handle(self, *args, **options):
+        paths = cycle(options["paths"] or DEFAULT_PATHS)
+        headers = {"Authorization": f"Bearer {options['token']}", "Accept-Encoding": "identity"}
+        lock = Lock()
+        latencies = []
+        errors = {}
+
+        def worker(deadline: float, record: bool) -> None:
+            while perf_counter() < deadline:
+                with lock:
+                    path = next(paths)
+                start = perf_counter()
+                try:
+                    request = Request(options["url"] + path, headers=headers)
+                    with urlopen(request, timeout=options["timeout"]) as response:
+                        response.read()
+                    error = None
+                except HTTPError as e:
+                    error = str(e.code)
+                except (URLError, OSError) as e:
+                    error = type(e).__name__
+                elapsed = perf_counter() - start
+
+                if not record:
+                    continue
+                with lock:
+                    if error is None:
+                        latencies.append(elapsed)
+                    else:
+                        errors[error] = errors.get(error, 0) + 1
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            for duration, record in ((options["warmup"], False), (options["duration"], True)):
+                deadline = perf_counter() + duration
+                futures = [executor.submit(worker, deadline, record) for _ in range(options["concurrency"])]
+                [future.result() for future in futures]
+
+        if not latencies:
+            raise CommandError(f"Nenhuma requisição bem sucedida, erros: {errors}")
+
+        latencies.sort()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(latencies)} requisições em {options['duration']:.0f}s "
+                f"({len(latencies) / options['duration']:.1f} req/s), "
+                f"p50 {percentile(latencies, 50) * 1000:.1f}ms, "
+                f"p99 {percentile(latencies, 99) * 1000:.1f}ms, "
+                f"máx {latencies[-1] * 1000:.1f}ms"
+            )
+        )
+        if errors:
+            self.stdout.write(self.style.WARNING(f"erros: {errors}"))
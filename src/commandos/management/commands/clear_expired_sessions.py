@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.tasks.session import clear_expired_sessions
+
+
+class Command(BaseCommand):
+    help = "Deletes the expired sessions in bounded batches and reports how many were deleted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.SESSION_SWEEP_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None)
+
+    def handle(self, *args, **options):
+        result = clear_expired_sessions(
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"{result['deleted']} sessões expiradas removidas em {result['batches']} lotes")
+        )
@@ -0,0 +1,20 @@
+"""
+ASGI config for core project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+The read endpoints, the import and the export download are routed to their async
+views (see API_ASYNC_VIEWS), so their streamed responses are not read whole by the
+handler, the other write endpoints stay sync and run in the thread pool of asgiref.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ.setdefault("API_ASYNC_VIEWS", "true")
+
+application = get_asgi_application()
@@ -3,6 +3,7 @@ import os
 
 
 from celery import Celery
+from celery.signals import worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
@@ -11,3 +12,13 @@ app = Celery("free_events")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def close_inherited_pools(**kwargs):
+    # A prefork child must not reuse the psycopg pool (and its threads) of the parent
+    from django.db import connections
+
+    for connection in connections.all():
+        if connection.settings_dict["OPTIONS"].get("pool"):
+            connection.close_pool()
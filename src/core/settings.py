@@ -29,6 +29,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -41,6 +42,7 @@ THIRD_PARTY_APPS = [
 
 LOCAL_APPS = [
     "accounts",
+    "commandos",
     "dashboards",
     "events",
 ]
@@ -49,6 +51,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "utils.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -56,6 +59,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "utils.routers.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -77,10 +81,30 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "core.wsgi.application"
+ASGI_APPLICATION = "core.asgi.application"
+
+# Routes the read endpoints to their async views, core.asgi turns it on by default
+API_ASYNC_VIEWS = env.bool("API_ASYNC_VIEWS", default=False)
 
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+
+# Every process (granian/celery worker) keeps its own psycopg pool. WEB_THREADS is the number
+# of threads running views in one worker (granian --blocking-threads), the pool keeps a
+# connection per thread and opens up to DATABASE_POOL_OVERFLOW more for bursts, so keep
+# workers * DATABASE_POOL_MAX_SIZE below the max_connections of Postgres
+DATABASE_POOL = env.bool("DATABASE_POOL", default=True)
+WEB_THREADS = env.int("WEB_THREADS", default=1)
+DATABASE_POOL_MIN_SIZE = env.int("DATABASE_POOL_MIN_SIZE", default=WEB_THREADS)
+DATABASE_POOL_OVERFLOW = env.int("DATABASE_POOL_OVERFLOW", default=2)
+DATABASE_POOL_MAX_SIZE = env.int("DATABASE_POOL_MAX_SIZE", default=WEB_THREADS + DATABASE_POOL_OVERFLOW)
+# Seconds a request waits for a free connection before failing
+DATABASE_POOL_TIMEOUT = env.float("DATABASE_POOL_TIMEOUT", default=10)
+# Seconds before idle connections above min_size are closed, and before any connection is recycled
+DATABASE_POOL_MAX_IDLE = env.float("DATABASE_POOL_MAX_IDLE", default=5 * 60)
+DATABASE_POOL_MAX_LIFETIME = env.float("DATABASE_POOL_MAX_LIFETIME", default=60 * 60)
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -89,11 +113,120 @@ DATABASES = {
         "PASSWORD": env("POSTGRES_PASSWORD"),
         "HOST": env("POSTGRES_HOST"),
         "PORT": env.int("POSTGRES_PORT"),
+        # With the pool, connections are checked before being handed out and a dead one is replaced
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "pool": (
+                {
+                    "min_size": DATABASE_POOL_MIN_SIZE,
+                    "max_size": DATABASE_POOL_MAX_SIZE,
+                    "timeout": DATABASE_POOL_TIMEOUT,
+                    "max_idle": DATABASE_POOL_MAX_IDLE,
+                    "max_lifetime": DATABASE_POOL_MAX_LIFETIME,
+                }
+                if DATABASE_POOL
+                else False
+            ),
+        },
     }
 }
 
+# Read replicas as host[:port] entries, sharing the name and credentials of the primary,
+# e.g. POSTGRES_REPLICA_HOSTS=replica1,replica2:5433. Read-only requests are routed to
+# them by utils.routers, pointing a replica at the primary itself works for local testing
+POSTGRES_REPLICA_HOSTS = env.list("POSTGRES_REPLICA_HOSTS", default=[])
+for index, replica in enumerate(POSTGRES_REPLICA_HOSTS, start=1):
+    replica_host, _, replica_port = replica.partition(":")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "PORT": int(replica_port) if replica_port else DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["utils.routers.ReplicaRouter"]
+# Seconds a client keeps reading from the primary after a request of it wrote something
+DATABASE_STICKY_SECONDS = env.int("DATABASE_STICKY_SECONDS", default=5)
+
 AUTH_USER_MODEL = "accounts.User"
 
+# Cache
+# https://github.com/jazzband/django-redis
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": env("REDIS_URL"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # Redis is a cache here, when it is down we fall back to the database
+            "IGNORE_EXCEPTIONS": True,
+        },
+    },
+    # Same Redis, errors raised: the token denylist has no fallback and must fail closed,
+    # see accounts.tokens.is_revoked
+    "auth": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": env("REDIS_URL"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "IGNORE_EXCEPTIONS": False,
+        },
+    },
+}
+DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
+
+# Seconds a resolved session/user stays in Redis
+AUTH_CACHE_TTL = env.int("AUTH_CACHE_TTL", default=5 * 60)
+# Seconds a resolved session/user stays in the worker memory, bounds how long other
+# workers keep serving it after an invalidation
+AUTH_CACHE_LOCAL_TTL = env.int("AUTH_CACHE_LOCAL_TTL", default=5)
+AUTH_CACHE_LOCAL_MAXSIZE = env.int("AUTH_CACHE_LOCAL_MAXSIZE", default=10_000)
+
+# "session" issues DB-backed session keys as bearer tokens, "signed" issues stateless
+# HMAC-signed tokens checked without touching django_session (see accounts.tokens)
+AUTH_TOKEN_MODE = env("AUTH_TOKEN_MODE", default="session")
+AUTH_TOKEN_MAX_AGE = env.int("AUTH_TOKEN_MAX_AGE", default=60 * 60 * 24)
+
+# Seconds an exact total is reused by the "cached" pagination count strategy
+PAGINATION_COUNT_CACHE_TTL = env.int("PAGINATION_COUNT_CACHE_TTL", default=30)
+# Below this planner estimate the "estimate" strategy runs an exact COUNT instead
+PAGINATION_ESTIMATE_THRESHOLD = env.int("PAGINATION_ESTIMATE_THRESHOLD", default=10_000)
+
+# Seconds the serialized event detail is fresh in Redis, and how long a stale copy is still
+# served while a single request refreshes it
+EVENT_DETAIL_CACHE_TTL = env.int("EVENT_DETAIL_CACHE_TTL", default=60)
+EVENT_DETAIL_CACHE_STALE_TTL = env.int("EVENT_DETAIL_CACHE_STALE_TTL", default=30)
+# Seconds a serialized event list page stays in Redis, any event write drops all of them
+# at once by bumping their generation
+EVENT_LIST_CACHE_TTL = env.int("EVENT_LIST_CACHE_TTL", default=30)
+
+# Waitlisted subscriptions promoted per transaction when seats of a full event free up
+WAITLIST_PROMOTION_BATCH_SIZE = env.int("WAITLIST_PROMOTION_BATCH_SIZE", default=200)
+
+# Most recent subscribers embedded in each event of the dashboard, the full list is paginated
+# by dashboards.views.dashboard_subscribers
+DASHBOARD_SUBSCRIPTIONS_LIMIT = env.int("DASHBOARD_SUBSCRIPTIONS_LIMIT", default=10)
+
+# Rows fetched per round trip of the server-side cursor of the format=ndjson exports
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+# Seconds events.tasks.export.export_attendees may run, instead of the CELERY_TASK_* limits
+# sized for short tasks: the soft limit marks the export as failed, the hard one kills it
+EXPORT_SOFT_TIME_LIMIT = env.int("EXPORT_SOFT_TIME_LIMIT", default=30 * 60)
+EXPORT_TIME_LIMIT = env.int("EXPORT_TIME_LIMIT", default=EXPORT_SOFT_TIME_LIMIT + 60)
+
+# Events inserted per bulk_create/transaction by the bulk import endpoint
+EVENT_IMPORT_BATCH_SIZE = env.int("EVENT_IMPORT_BATCH_SIZE", default=500)
+
+# JSON responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = env.int("COMPRESSION_MIN_SIZE", default=1024)
+# Preference order, zstd/br are only used when zstandard/brotli are installed
+COMPRESSION_ENCODINGS = env.list("COMPRESSION_ENCODINGS", default=["zstd", "br", "gzip"])
+COMPRESSION_ZSTD_LEVEL = env.int("COMPRESSION_ZSTD_LEVEL", default=3)
+COMPRESSION_BROTLI_QUALITY = env.int("COMPRESSION_BROTLI_QUALITY", default=4)
+COMPRESSION_GZIP_LEVEL = env.int("COMPRESSION_GZIP_LEVEL", default=6)
+# Under ASGI, bodies at least this large are compressed in a thread instead of the event loop
+COMPRESSION_OFFLOAD_SIZE = env.int("COMPRESSION_OFFLOAD_SIZE", default=64 * 1024)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -217,3 +350,21 @@ CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_WORKER_SEND_TASK_EVENTS = True
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std-setting-task_send_sent_event
 CELERY_TASK_SEND_SENT_EVENT = True
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-schedule
+CELERY_BEAT_SCHEDULE = {
+    "clear-expired-sessions": {
+        "task": "accounts.tasks.session.clear_expired_sessions",
+        "schedule": env.int("SESSION_SWEEP_INTERVAL", default=60 * 60),
+    },
+    "reconcile-subscription-counts": {
+        "task": "events.tasks.counts.reconcile_subscription_counts",
+        "schedule": env.int("SUBSCRIPTION_COUNTS_RECONCILE_INTERVAL", default=15 * 60),
+    },
+    "promote-waitlists": {
+        "task": "events.tasks.waitlist.promote_waitlists",
+        "schedule": env.int("WAITLIST_SWEEP_INTERVAL", default=5 * 60),
+    },
+}
+
+# Sessions deleted per statement by accounts.tasks.session.clear_expired_sessions
+SESSION_SWEEP_BATCH_SIZE = env.int("SESSION_SWEEP_BATCH_SIZE", default=1000)
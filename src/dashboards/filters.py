@@ -1,8 +1,10 @@
 from pydantic import BaseModel, model_validator, ConfigDict, Field
-from typing import Optional, Literal
+from typing import Optional, Literal, Tuple
 from datetime import datetime
 from django.db.models import Q
 from events.constants import REVERSE_TRANSLATED_SUBSCRIPTION_STATUS
+from events.utils import FIELDS_BY_DASHBOARD_EVENT, parse_fields
+from utils.pagination import decode_cursor
 
 
 class EventParamsDashboard(BaseModel):
@@ -18,6 +20,9 @@ class EventParamsDashboard(BaseModel):
     order_by: Optional[Literal["start_at", "title", "status"]] = "start_at"
     order: Optional[Literal["asc", "desc"]] = "asc"
     search: Optional[str] = None
+    count: Optional[Literal["exact", "cached", "estimate", "none"]] = "exact"
+    fields: Optional[str] = None
+    projection: Tuple[str, ...] = FIELDS_BY_DASHBOARD_EVENT
     params: Q = Field(default_factory=Q)
     offset: int = 0
 
@@ -64,6 +69,7 @@ class EventParamsDashboard(BaseModel):
         self.params &= Q(start_at__gte=self.start_at)
 
         self.offset = (self.page - 1) * self.limit
+        self.projection = parse_fields(self.fields, FIELDS_BY_DASHBOARD_EVENT)
 
         return self
 
@@ -119,3 +125,30 @@ class SubscriptionParams(BaseModel):
         self.params &= Q(event__start_at__gte=self.start_at)
 
         return self
+
+
+class SubscribersParams(BaseModel):
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        ignored_types=(Q,),
+        arbitrary_types_allowed=True,
+    )
+    status: Optional[Literal["criado", "confirmado", "cancelado", "desinscrito", "espera"]] = None
+    limit: Optional[int] = 50
+    cursor: Optional[str] = None
+    # Fixed, served by subscription_event_recent_idx
+    order_by: Literal["-created_at"] = "-created_at"
+    params: Q = Field(default_factory=Q)
+
+    @model_validator(mode="after")
+    def check_params(self):
+        if self.limit < 1 or self.limit > 500:
+            raise ValueError("Limite deve ser entre 1 e 500")
+
+        if self.cursor:
+            decode_cursor(self.cursor, self.order_by)
+
+        if self.status:
+            self.params &= Q(current_status=REVERSE_TRANSLATED_SUBSCRIPTION_STATUS[self.status])
+
+        return self
@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.urls import path
 
 
-from dashboards.views import dashboard
+from dashboards.views import dashboard, adashboard, dashboard_subscribers, metrics
+
+if settings.API_ASYNC_VIEWS:
+    dashboard = adashboard
 
 
 urlpatterns = [
     path("", dashboard, name="dashboard"),
+    path("metrics/", metrics, name="metrics"),
+    path("<uuid:event_uid>/subscribers/", dashboard_subscribers, name="dashboard-subscribers"),
 ]
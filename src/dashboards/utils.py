@@ -0,0 +1,34 @@
+from typing import Tuple
+
+from django.conf import settings
+
+from events.utils import FIELDS_BY_DASHBOARD_EVENT
+from sql import DASHBOARDS_LIST_SUBSCRIPTIONS, DASHBOARDS_TOTAL_SUBSCRIPTIONS, FETCH_DASHBOARDS_EVENTS
+
+
+def fetch_dashboards_events_sql(fields: Tuple[str, ...] = FIELDS_BY_DASHBOARD_EVENT) -> str:
+    """
+    Builds FETCH_DASHBOARDS_EVENTS selecting only the requested columns, the correlated
+    list_subscriptions subquery only runs when it is requested.
+
+    list_subscriptions holds the DASHBOARD_SUBSCRIPTIONS_LIMIT most recent subscribers
+    and total_subscriptions is read from events_eventsubscriptioncounts, so the cost of
+    a page does not depend on the size of its events, see dashboard_subscribers for the
+    full list.
+
+    Args:
+        fields (Tuple[str, ...], optional): Fields validated against FIELDS_BY_DASHBOARD_EVENT.
+
+    Returns:
+        str: The SQL, taking the LIMIT and OFFSET as parameters.
+    """
+    expressions = {
+        "list_subscriptions": DASHBOARDS_LIST_SUBSCRIPTIONS.format(limit=int(settings.DASHBOARD_SUBSCRIPTIONS_LIMIT)),
+        "total_subscriptions": DASHBOARDS_TOTAL_SUBSCRIPTIONS,
+    }
+    columns = [
+        f"{expressions[field].strip()} AS {field}" if field in expressions else f"ee.{field}"
+        for field in fields
+        if field in FIELDS_BY_DASHBOARD_EVENT
+    ]
+    return FETCH_DASHBOARDS_EVENTS.format(fields=",\n    ".join(columns))
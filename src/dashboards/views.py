@@ -1,12 +1,32 @@
 from accounts.decorators import check_session_view
-from utils.response import JsonResponseBadRequest, JsonResponse
-from utils.pagination import generate_pagination_by_sql
-from dashboards.filters import EventParamsDashboard
+from utils.response import JsonResponseBadRequest, JsonResponse, UnauthorizedResponse
+from utils import metrics as process_metrics
+from uuid import UUID
+from django.db.models import Case, CharField, F, Value, When
+from utils.pagination import generate_pagination_by_sql, generate_pagination_by_cursor, count_queryset
+from dashboards.filters import EventParamsDashboard, SubscribersParams
 from pydantic import ValidationError
-from sql import FETCH_DASHBOARDS_EVENTS
-from django.db import connection
-from utils.models import dict_fetchall
+from dashboards.utils import fetch_dashboards_events_sql
+from django.db import connections, router
+from utils.models import dict_fetchall, pool_stats
 from orjson import loads
+from events.models import Event, Subscription
+from events.constants import TRANSLATED_SUBSCRIPTION_STATUS
+from asgiref.sync import sync_to_async
+
+
+def _dashboard_page(event_params: EventParamsDashboard) -> dict:
+    total, count = count_queryset(Event.objects.all(), event_params.count)
+    limit = event_params.limit + 1 if total is None else event_params.limit
+
+    with connections[router.db_for_read(Event)].cursor() as cursor:
+        cursor.execute(fetch_dashboards_events_sql(event_params.projection), [limit, event_params.offset])
+        events = dict_fetchall(cursor)
+
+    if "list_subscriptions" in event_params.projection:
+        [event.update({"list_subscriptions": loads(event["list_subscriptions"])}) for event in events]
+
+    return generate_pagination_by_sql(events, event_params.page, event_params.limit, total, count)
 
 
 @check_session_view("GET")
@@ -20,6 +40,13 @@ def dashboard(request):
     Returns:
         JsonResponse: A JSON response containing paginated event data or an error message.
 
+    `fields=` keeps only the listed keys of each event (any of FIELDS_BY_DASHBOARD_EVENT),
+    leaving `list_subscriptions` out also skips its subquery.
+
+    `list_subscriptions` only holds the DASHBOARD_SUBSCRIPTIONS_LIMIT most recent
+    subscribers of each event and `total_subscriptions` counts all of them, the full list
+    is served by dashboard_subscribers.
+
     Example:
         >>> dashboard(request)
        {
@@ -28,9 +55,9 @@ def dashboard(request):
         "next_page": null,
         "num_pages": 1,
         "total": 2,
+        "count_strategy": "exact",
         "data": [
             {
-            "total": 2,
             "uid": "101dc542-6115-4ce9-b113-514411b7dc93",
             "title": "São João ",
             "description": "O Melhor São João do Brasil",
@@ -45,10 +72,10 @@ def dashboard(request):
                 "email": "aa@aa.com",
                 "status": "Desinscrito"
                 }
-            ]
+            ],
+            "total_subscriptions": 1
             },
             {
-            "total": 2,
             "uid": "fbdbe5fe-3d3c-4ce4-8486-09796c5b1cfc",
             "title": "São João",
             "description": "O São João do Brasil",
@@ -57,7 +84,8 @@ def dashboard(request):
             "is_active": true,
             "created_at": "2024-11-01T00:03:03.028613",
             "updated_at": "2024-11-01T00:03:03.028754",
-            "list_subscriptions": []
+            "list_subscriptions": [],
+            "total_subscriptions": 0
             }
             ]
         }
@@ -81,11 +109,168 @@ def dashboard(request):
             }
         )
 
-    with connection.cursor() as cursor:
-        cursor.execute(FETCH_DASHBOARDS_EVENTS, [event_params.limit, event_params.offset])
-        events = dict_fetchall(cursor)
+    return JsonResponse(content=_dashboard_page(event_params))
+
+
+@check_session_view("GET")
+async def adashboard(request):
+    """
+    Async version of dashboard, served by core.asgi. The count and the raw SQL run in a
+    single worker thread hop, the async ORM has no raw cursor.
+    """
+    try:
+        event_params = EventParamsDashboard(**request.GET.dict())
+    except ValidationError as e:
+        error = [
+            {
+                "loc": x["loc"],
+                "msg": x["msg"],
+                "type": x["type"],
+            }
+            for x in e.errors()
+        ]
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": error,
+            }
+        )
 
-    [event.update({"list_subscriptions": loads(event["list_subscriptions"])}) for event in events]
+    return JsonResponse(content=await sync_to_async(_dashboard_page)(event_params))
 
-    data = generate_pagination_by_sql(events, event_params.page, event_params.limit)
-    return JsonResponse(content=data)
+
+@check_session_view("GET")
+def dashboard_subscribers(request, event_uid: UUID):
+    """
+    Lists every subscriber of an event, most recent first, with keyset pagination: each
+    page is a range scan of subscription_event_recent_idx, whatever the size of the
+    event and the depth of the page.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing GET parameters.
+        event_uid (UUID): The unique identifier of the event.
+
+    Returns:
+        JsonResponse: A JSON response containing a page of subscribers or an error message.
+
+    Example:
+        Request:
+        ```
+        GET /dashboards/123e4567-e89b-12d3-a456-426614174000/subscribers/?limit=2&status=criado
+        ```
+
+        Response:
+        ```
+        {
+            "success": true,
+            "previous_cursor": null,
+            "next_cursor": "eyJvcmRlcl9ieSI6Ii1jcmVhdGVkX2F0IiwiZGlyZWN0aW9uIjoibmV4dCJ9",
+            "data": [
+                {
+                    "uid": "1efe9a37-3b55-4757-8437-5197bf090671",
+                    "email": "aa@aa.com",
+                    "status": "Criado",
+                    "created_at": "2024-11-01T00:03:03.028613"
+                }
+            ]
+        }
+        ```
+    """
+    try:
+        subscribers_params = SubscribersParams(**request.GET.dict())
+    except ValidationError as e:
+        error = [
+            {
+                "loc": x["loc"],
+                "msg": x["msg"],
+                "type": x["type"],
+            }
+            for x in e.errors()
+        ]
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": error,
+            }
+        )
+
+    event_id = Event.objects.filter(uid=event_uid).values_list("id", flat=True).first()
+    if event_id is None:
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": [
+                    {
+                        "loc": "event_uid",
+                        "msg": "Evento não encontrado",
+                        "type": "not_found",
+                    }
+                ],
+            }
+        )
+
+    subscribers = (
+        Subscription.objects.filter(subscribers_params.params, event_id=event_id)
+        .values("uid", "created_at", email=F("user__email"))
+        .annotate(
+            status=Case(
+                *[
+                    When(current_status=status, then=Value(translated))
+                    for status, translated in TRANSLATED_SUBSCRIPTION_STATUS.items()
+                ],
+                default=Value("Desconhecido"),
+                output_field=CharField(),
+            ),
+        )
+    )
+
+    return JsonResponse(
+        content=generate_pagination_by_cursor(
+            subscribers,
+            subscribers_params.order_by,
+            subscribers_params.cursor,
+            subscribers_params.limit,
+        )
+    )
+
+
+@check_session_view("GET")
+def metrics(request):
+    """
+    Exposes the in-process counters (cache hit/miss rates and friends) and the database
+    pool counters of the worker that served the request. Only staff users can read it.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: A JSON response containing the counters of this worker process.
+
+    Example:
+        >>> metrics(request)
+        {
+            "success": true,
+            "data": {
+                "pid": 42,
+                "metrics": {
+                    "auth.session": {"local_hits": 10, "redis_hits": 2, "misses": 1, "hits": 12, "hit_rate": 0.923},
+                    "auth.user": {"local_hits": 10, "redis_hits": 2, "misses": 1, "hits": 12, "hit_rate": 0.923}
+                },
+                "pools": {
+                    "default": {"pool_size": 3, "pool_available": 2, "requests_num": 120, "avg_wait_ms": 0.4}
+                }
+            }
+        }
+    """
+    if not request.user.is_staff:
+        return UnauthorizedResponse()
+
+    return JsonResponse(
+        content={
+            "success": True,
+            "data": {
+                **process_metrics.snapshot(),
+                "pools": pool_stats(),
+            },
+        }
+    )
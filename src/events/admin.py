@@ -1,9 +1,11 @@
 from django.contrib import admin
 
 # Register your models here.
-from events.models import Event, Subscription, SubscriptionStatus
+from events.models import Event, Subscription, SubscriptionStatus, EventSubscriptionCounts, AttendeeExport
 
 
 admin.site.register(Event)
 admin.site.register(Subscription)
 admin.site.register(SubscriptionStatus)
+admin.site.register(EventSubscriptionCounts)
+admin.site.register(AttendeeExport)
@@ -0,0 +1,222 @@
+from datetime import datetime
+from time import perf_counter, time
+from typing import Callable, Iterable, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache
+from orjson import dumps
+
+from utils import metrics
+from utils.cache import get_or_set_locked
+from utils.conditional import make_etag
+from utils.routers import replica_reads
+from events.utils import EVENT_SHAPE
+
+DETAIL_KEY_PREFIX = "events:detail:"
+LIST_KEY_PREFIX = "events:list:"
+LIST_GENERATION_KEY = "events:list:generation"
+
+
+def _detail_key(event_uid) -> str:
+    return f"{DETAIL_KEY_PREFIX}{event_uid}"
+
+
+def _load_detail(event_uid: UUID) -> Optional[Tuple[bytes, str, datetime]]:
+    from events.models import Event
+
+    # The entry is shared by every client, it must not come from a lagging replica
+    with replica_reads(False):
+        event = EVENT_SHAPE.fetch(Event.objects.filter(uid=event_uid))
+    if event is None:
+        return None
+
+    body = dumps({"success": True, "data": event})
+    return body, make_etag(body), event["updated_at"]
+
+
+def get_detail(event_uid: UUID) -> Optional[Tuple[bytes, str, datetime]]:
+    """
+    Returns the serialized body of the event detail, built with a single query on a miss.
+
+    Args:
+        event_uid (UUID): The uid of the event.
+
+    Returns:
+        Optional[Tuple[bytes, str, datetime]]: The JSON body of the detail response with its ETag
+                                               and the updated_at of the event, or None if the
+                                               event does not exist.
+    """
+    return get_or_set_locked(
+        _detail_key(event_uid),
+        lambda: _load_detail(event_uid),
+        ttl=settings.EVENT_DETAIL_CACHE_TTL,
+        stale_ttl=settings.EVENT_DETAIL_CACHE_STALE_TTL,
+        group="events.detail",
+    )
+
+
+def delete_detail(event_uid: UUID) -> None:
+    """
+    Removes the cached detail of an event, used when the event is updated or deleted.
+
+    Args:
+        event_uid (UUID): The uid of the event.
+    """
+    cache.delete(_detail_key(event_uid))
+
+
+def delete_details(event_uids: Iterable[UUID]) -> None:
+    """
+    Removes the cached detail of several events at once.
+
+    Args:
+        event_uids (Iterable[UUID]): The uids of the events.
+    """
+    keys = [_detail_key(event_uid) for event_uid in event_uids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def list_generation() -> Optional[int]:
+    """
+    Returns the current generation of the event list pages, part of every page key.
+
+    A missing counter (never set, or evicted) starts from the clock in milliseconds, so it
+    never goes back to the generation of pages that are still cached.
+
+    Returns:
+        Optional[int]: The generation, or None when Redis is unavailable.
+    """
+    generation = cache.get(LIST_GENERATION_KEY)
+    if generation is None:
+        cache.add(LIST_GENERATION_KEY, int(time() * 1000), None)
+        generation = cache.get(LIST_GENERATION_KEY)
+    return generation
+
+
+def bump_list_generation() -> None:
+    """
+    Invalidates every cached event list page at once, used when an event is created,
+    updated or deleted. The old pages are never read again and expire on their own.
+    """
+    try:
+        cache.incr(LIST_GENERATION_KEY)
+    except ValueError:
+        cache.add(LIST_GENERATION_KEY, int(time() * 1000), None)
+
+
+def invalidate_event(event_uid: UUID) -> None:
+    """
+    Drops the cached detail of an event and every event and subscription list page, used
+    when its seats_taken, its subscription counts or the status of its subscriptions
+    change: those are written by queryset updates and triggers, which send no signal.
+    Call it on commit.
+
+    Args:
+        event_uid (UUID): The uid of the event.
+    """
+    delete_detail(event_uid)
+    bump_list_generation()
+
+
+def list_fingerprint(event_params) -> str:
+    """
+    Identifies a list page by its validated params, so requests asking for the same page
+    in different ways (defaults omitted, params reordered, `cursor` without
+    `pagination=cursor`...) share it.
+
+    Args:
+        event_params (EventParams): The validated params of the request.
+
+    Returns:
+        str: The hex digest of the normalized params.
+    """
+    return make_etag(
+        event_params.start_at.isoformat(),
+        event_params.search,
+        event_params.order_by,
+        event_params.pagination,
+        event_params.cursor,
+        event_params.page,
+        event_params.limit,
+        event_params.count,
+        event_params.format,
+        ",".join(event_params.projection),
+    )
+
+
+def list_etag(event_params) -> Optional[str]:
+    """
+    ETag of a list page: it only changes with the generation, so answering a matching
+    If-None-Match costs a single Redis read.
+
+    Args:
+        event_params (EventParams): The validated params of the request.
+
+    Returns:
+        Optional[str]: The ETag, or None when Redis is unavailable.
+    """
+    generation = list_generation()
+    if generation is None:
+        return None
+    return make_etag(generation, list_fingerprint(event_params))
+
+
+def subscription_list_etag(subscription_params, query: Iterable[Tuple[str, str]]) -> Optional[str]:
+    """
+    ETag of a subscription list page. Everything such a page shows changes with the list
+    generation: a subscription created or changing status bumps it through
+    invalidate_event, an event updated or deleted through the signals of events.signals.
+
+    Args:
+        subscription_params (SubscriptionParams): The validated params of the request.
+        query (Iterable[Tuple[str, str]]): The query string params of the request.
+
+    Returns:
+        Optional[str]: The ETag, or None when Redis is unavailable.
+    """
+    generation = list_generation()
+    if generation is None:
+        return None
+    return make_etag("subscriptions", generation, subscription_params.start_at.isoformat(), sorted(query))
+
+
+def get_list_page(event_params, loader: Callable[[], dict]) -> bytes:
+    """
+    Returns the serialized body of an event list page, built with ``loader`` on a miss.
+
+    Pages live EVENT_LIST_CACHE_TTL seconds under the current generation. The time spent
+    building them is counted in "events.list.db_ms", the time saved by a hit (the build
+    time of the cached page) in "events.list.saved_ms", next to the hit rate.
+
+    Args:
+        event_params (EventParams): The validated params of the request.
+        loader (Callable[[], dict]): Builds the page, e.g. the pagination of the queryset.
+
+    Returns:
+        bytes: The JSON body of the list response.
+    """
+    generation = list_generation()
+    if generation is None:
+        return dumps(loader())
+
+    loaded = False
+
+    def load() -> Tuple[bytes, float]:
+        nonlocal loaded
+        loaded = True
+        started_at = perf_counter()
+        # The page is shared by every client, it must not come from a lagging replica
+        with replica_reads(False):
+            body = dumps(loader())
+        return body, (perf_counter() - started_at) * 1000
+
+    body, load_ms = get_or_set_locked(
+        f"{LIST_KEY_PREFIX}{generation}:{list_fingerprint(event_params)}",
+        load,
+        ttl=settings.EVENT_LIST_CACHE_TTL,
+        group="events.list",
+    )
+    metrics.incr("events.list.db_ms" if loaded else "events.list.saved_ms", load_ms)
+    return body
@@ -7,6 +7,7 @@ class TypeSubscriptionStatus(IntEnum):
     CONFIRMED = 2
     CANCELED = 3
     UNSIGNED = 4
+    WAITLISTED = 5
 
     @classmethod
     def choices(cls):
@@ -15,6 +16,7 @@ class TypeSubscriptionStatus(IntEnum):
             (cls.CONFIRMED, "Confirmed"),
             (cls.CANCELED, "Canceled"),
             (cls.UNSIGNED, "Unsigned"),
+            (cls.WAITLISTED, "Waitlisted"),
         ]
 
 
@@ -23,6 +25,19 @@ TRANSLATED_SUBSCRIPTION_STATUS = {
     TypeSubscriptionStatus.CONFIRMED: "Confirmado",
     TypeSubscriptionStatus.CANCELED: "Cancelado",
     TypeSubscriptionStatus.UNSIGNED: "Desinscrito",
+    TypeSubscriptionStatus.WAITLISTED: "Em espera",
+}
+
+# Statuses whose subscription counts in Event.seats_taken
+SEAT_HOLDING_STATUSES = (TypeSubscriptionStatus.CREATED, TypeSubscriptionStatus.CONFIRMED)
+
+# Column of EventSubscriptionCounts counting the subscriptions in each status
+SUBSCRIPTION_COUNT_FIELDS = {
+    TypeSubscriptionStatus.CREATED: "created",
+    TypeSubscriptionStatus.CONFIRMED: "confirmed",
+    TypeSubscriptionStatus.CANCELED: "canceled",
+    TypeSubscriptionStatus.UNSIGNED: "unsigned",
+    TypeSubscriptionStatus.WAITLISTED: "waitlisted",
 }
 
 REVERSE_TRANSLATED_SUBSCRIPTION_STATUS = {
@@ -30,4 +45,32 @@ REVERSE_TRANSLATED_SUBSCRIPTION_STATUS = {
     "confirmado": TypeSubscriptionStatus.CONFIRMED,
     "cancelado": TypeSubscriptionStatus.CANCELED,
     "desinscrito": TypeSubscriptionStatus.UNSIGNED,
+    "espera": TypeSubscriptionStatus.WAITLISTED,
+}
+
+
+class TypeExportStatus(IntEnum):
+    PENDING = 1
+    RUNNING = 2
+    DONE = 3
+    FAILED = 4
+
+    @classmethod
+    def choices(cls):
+        return [
+            (cls.PENDING, "Pending"),
+            (cls.RUNNING, "Running"),
+            (cls.DONE, "Done"),
+            (cls.FAILED, "Failed"),
+        ]
+
+
+TRANSLATED_EXPORT_STATUS = {
+    TypeExportStatus.PENDING: "Pendente",
+    TypeExportStatus.RUNNING: "Em andamento",
+    TypeExportStatus.DONE: "Concluído",
+    TypeExportStatus.FAILED: "Falhou",
 }
+
+# Text search configuration created by events.0003: portuguese stemming over unaccented words
+SEARCH_CONFIG = "portuguese_unaccent"
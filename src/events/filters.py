@@ -1,8 +1,17 @@
 from pydantic import BaseModel, model_validator, ConfigDict, Field
-from typing import Optional, Literal
+from typing import Optional, Literal, Tuple
 from datetime import datetime
 from django.db.models import Q
-from events.constants import REVERSE_TRANSLATED_SUBSCRIPTION_STATUS
+from django.contrib.postgres.search import SearchQuery
+from events.constants import REVERSE_TRANSLATED_SUBSCRIPTION_STATUS, SEARCH_CONFIG
+from utils.pagination import decode_cursor
+from events.utils import FIELDS_BY_EVENT_MODEL_DUMP, FIELDS_BY_SUBSCRIPTION_LIST, parse_fields
+
+
+def current_minute() -> datetime:
+    # Default start_at of the lists: every worker builds the same page keys and ETags
+    # within a minute, and they move on with the clock
+    return datetime.now().replace(second=0, microsecond=0)
 
 
 class EventParams(BaseModel):
@@ -11,12 +20,19 @@ class EventParams(BaseModel):
         ignored_types=(Q,),
         arbitrary_types_allowed=True,
     )
-    start_at: datetime = datetime.now()
+    start_at: datetime = Field(default_factory=current_minute)
     limit: Optional[int] = 10
     page: Optional[int] = 1
-    order_by: Optional[Literal["start_at", "title"]] = "start_at"
+    order_by: Optional[Literal["start_at", "title", "relevance"]] = "start_at"
     order: Optional[Literal["asc", "desc"]] = "asc"
     search: Optional[str] = None
+    search_query: Optional[SearchQuery] = None
+    count: Optional[Literal["exact", "cached", "estimate", "none"]] = "exact"
+    pagination: Optional[Literal["page", "cursor"]] = "page"
+    cursor: Optional[str] = None
+    format: Optional[Literal["json", "ndjson"]] = "json"
+    fields: Optional[str] = None
+    projection: Tuple[str, ...] = FIELDS_BY_EVENT_MODEL_DUMP
     params: Q = Field(default_factory=Q)
 
     @model_validator(mode="after")
@@ -27,7 +43,7 @@ class EventParams(BaseModel):
         if self.page < 1:
             raise ValueError("Pagina não pode ser menor que 1")
 
-        if self.order_by not in ["start_at", "title"]:
+        if self.order_by not in ["start_at", "title", "relevance"]:
             raise ValueError("Ordenação inválida")
 
         if self.order not in ["asc", "desc"]:
@@ -36,12 +52,30 @@ class EventParams(BaseModel):
         if self.search and len(self.search) < 3:
             raise ValueError("Pesquisa deve ter no mínimo 3 caracteres")
 
-        self.order_by = self.order_by if self.order == "asc" else f"-{self.order_by}"
+        if self.order_by == "relevance" and not self.search:
+            raise ValueError("Ordenação por relevância exige uma pesquisa")
+
+        if self.order_by == "relevance":
+            # The most relevant events always come first
+            self.order_by = "-rank"
+        else:
+            self.order_by = self.order_by if self.order == "asc" else f"-{self.order_by}"
+
+        if self.cursor:
+            self.pagination = "cursor"
+
+        if self.pagination == "cursor":
+            if self.order_by == "-rank":
+                raise ValueError("Ordenação por relevância não suportada na paginação por cursor")
+
+            if self.cursor:
+                decode_cursor(self.cursor, self.order_by)
+
+        self.projection = parse_fields(self.fields, FIELDS_BY_EVENT_MODEL_DUMP)
+
         if self.search:
-            self.params &= Q(
-                title__icontains=self.search,
-                address__icontains=self.search,
-            )
+            self.search_query = SearchQuery(self.search, config=SEARCH_CONFIG, search_type="websearch")
+            self.params &= Q(search_vector=self.search_query)
         self.params &= Q(start_at__gte=self.start_at)
 
         return self
@@ -53,13 +87,20 @@ class SubscriptionParams(BaseModel):
         ignored_types=(Q,),
         arbitrary_types_allowed=True,
     )
-    start_at: datetime = datetime.now()
-    status: Optional[Literal["criado", "confirmado", "cancelado", "desinscrito"]] = None
+    start_at: datetime = Field(default_factory=current_minute)
+    status: Optional[Literal["criado", "confirmado", "cancelado", "desinscrito", "espera"]] = None
     limit: Optional[int] = 10
     page: Optional[int] = 1
-    order_by: Optional[Literal["start_at", "title", "status"]] = "start_at"
+    order_by: Optional[Literal["start_at", "title", "status", "relevance"]] = "start_at"
     order: Optional[Literal["asc", "desc"]] = "asc"
     search: Optional[str] = None
+    search_query: Optional[SearchQuery] = None
+    count: Optional[Literal["exact", "cached", "estimate", "none"]] = "exact"
+    pagination: Optional[Literal["page", "cursor"]] = "page"
+    cursor: Optional[str] = None
+    format: Optional[Literal["json", "ndjson"]] = "json"
+    fields: Optional[str] = None
+    projection: Tuple[str, ...] = FIELDS_BY_SUBSCRIPTION_LIST
     params: Q = Field(default_factory=Q)
 
     @model_validator(mode="after")
@@ -70,7 +111,7 @@ class SubscriptionParams(BaseModel):
         if self.page < 1:
             raise ValueError("Pagina não pode ser menor que 1")
 
-        if self.order_by not in ["start_at", "title", "status"]:
+        if self.order_by not in ["start_at", "title", "status", "relevance"]:
             raise ValueError("Ordenação inválida")
 
         if self.order not in ["asc", "desc"]:
@@ -79,21 +120,38 @@ class SubscriptionParams(BaseModel):
         if self.search and len(self.search) < 3:
             raise ValueError("Pesquisa deve ter no mínimo 3 caracteres")
 
-        if self.status is not None and self.status.lower() not in ["criado", "confirmado", "cancelado", "desinscrito"]:
+        if self.order_by == "relevance" and not self.search:
+            raise ValueError("Ordenação por relevância exige uma pesquisa")
+
+        if self.status is not None and self.status.lower() not in REVERSE_TRANSLATED_SUBSCRIPTION_STATUS:
             raise ValueError("Status inválido")
 
         if self.status:
-            self.params &= Q(status=REVERSE_TRANSLATED_SUBSCRIPTION_STATUS[self.status.lower()])
+            self.params &= Q(current_status=REVERSE_TRANSLATED_SUBSCRIPTION_STATUS[self.status.lower()])
 
         if self.order_by == "status":
-            self.order_by = (
-                f"subscription_statuses__status" if self.order == "asc" else f"-subscription_statuses__status"
-            )
+            self.order_by = "current_status" if self.order == "asc" else "-current_status"
+        elif self.order_by == "relevance":
+            # The most relevant events always come first
+            self.order_by = "-rank"
         else:
             self.order_by = f"event__{self.order_by}" if self.order == "asc" else f"-event__{self.order_by}"
 
+        if self.cursor:
+            self.pagination = "cursor"
+
+        if self.pagination == "cursor":
+            if self.order_by == "-rank":
+                raise ValueError("Ordenação por relevância não suportada na paginação por cursor")
+
+            if self.cursor:
+                decode_cursor(self.cursor, self.order_by)
+
+        self.projection = parse_fields(self.fields, FIELDS_BY_SUBSCRIPTION_LIST)
+
         if self.search:
-            self.params &= Q(event__title__icontains=self.search, event__address__icontains=self.search)
+            self.search_query = SearchQuery(self.search, config=SEARCH_CONFIG, search_type="websearch")
+            self.params &= Q(event__search_vector=self.search_query)
 
         self.params &= Q(event__start_at__gte=self.start_at)
 
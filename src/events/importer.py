@@ -0,0 +1,137 @@
+from itertools import islice
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, transaction
+from orjson import JSONDecodeError
+from pydantic import ValidationError
+
+from events import cache as event_cache
+from events.models import Event
+from events.schemas.event import EventCreate
+
+
+def _row_error(line: int, error: Exception) -> dict:
+    if isinstance(error, ValidationError):
+        errors = [{"loc": x["loc"], "msg": x["msg"], "type": x["type"]} for x in error.errors()]
+    elif isinstance(error, JSONDecodeError):
+        errors = [{"loc": line, "msg": error.msg, "type": "json_error"}]
+    elif isinstance(error, DatabaseError):
+        errors = [{"loc": line, "msg": str(error).strip(), "type": "database_error"}]
+    else:
+        errors = [{"loc": line, "msg": str(error), "type": "json_error"}]
+
+    return {"line": line, "success": False, "error": errors}
+
+
+def _row_created(line: int, event: Event) -> dict:
+    return {"line": line, "success": True, "data": {"uid": event.uid}}
+
+
+def _insert(batch: List[Tuple[int, Event]]) -> Iterator[dict]:
+    try:
+        with transaction.atomic():
+            Event.objects.bulk_create([event for _, event in batch])
+    except DatabaseError:
+        # Retry one by one so a single bad row does not reject the whole batch
+        for line, event in batch:
+            try:
+                with transaction.atomic():
+                    event.save(force_insert=True)
+            except DatabaseError as e:
+                yield _row_error(line, e)
+            else:
+                yield _row_created(line, event)
+        return
+
+    # bulk_create sends no post_save, the one-by-one retry above does
+    event_cache.bump_list_generation()
+    for line, event in batch:
+        yield _row_created(line, event)
+
+
+def _take(results: Iterator[dict], count: int) -> List[dict]:
+    return list(islice(results, count))
+
+
+def bulk_create_events(rows: Iterable[Tuple[int, Any]], promoter, batch_size: int) -> Iterator[dict]:
+    """
+    Validates and inserts events read from an upload, yielding one result per row.
+
+    Valid rows are inserted with bulk_create in batches of ``batch_size``, each one in its
+    own transaction, so only the current batch is held in memory. Invalid rows are reported
+    as soon as they are read, created rows when their batch is committed, every result
+    carries the line (or array position) of its row. The last result is a summary.
+
+    Args:
+        rows (Iterable[Tuple[int, Any]]): Line and decoded row (or its decoding error),
+            as yielded by utils.streaming.iter_ndjson and iter_json_array.
+        promoter (User): The promoter of the imported events.
+        batch_size (int): Number of events per INSERT and transaction.
+
+    Yields:
+        dict: {"line", "success", "data": {"uid"}} or {"line", "success", "error"} per row,
+              then {"success", "created", "failed"}.
+    """
+    batch = []
+    created = 0
+    failed = 0
+
+    def flush() -> Iterator[dict]:
+        nonlocal created, failed
+        for result in _insert(batch):
+            if result["success"]:
+                created += 1
+            else:
+                failed += 1
+            yield result
+        batch.clear()
+
+    for line, row in rows:
+        if isinstance(row, Exception):
+            failed += 1
+            yield _row_error(line, row)
+            continue
+
+        try:
+            payload = EventCreate.model_validate(row)
+        except ValidationError as e:
+            failed += 1
+            yield _row_error(line, e)
+            continue
+
+        batch.append(
+            (
+                line,
+                Event(
+                    title=payload.title,
+                    description=payload.description,
+                    start_at=payload.start_at,
+                    address=payload.address,
+                    capacity=payload.capacity,
+                    promoter=promoter,
+                ),
+            )
+        )
+        if len(batch) >= batch_size:
+            yield from flush()
+
+    if batch:
+        yield from flush()
+
+    yield {"success": failed == 0, "created": created, "failed": failed}
+
+
+async def abulk_create_events(rows: Iterable[Tuple[int, Any]], promoter, batch_size: int) -> AsyncIterator[dict]:
+    """
+    Async version of bulk_create_events, served by core.asgi.
+
+    The rows are read, validated and inserted in worker thread hops of ``batch_size``
+    results each, so every batch is sent as soon as it is committed instead of the
+    whole import running before the first byte of the response.
+    """
+    results = bulk_create_events(rows, promoter, batch_size)
+    take = sync_to_async(_take)
+    while batch := await take(results, batch_size):
+        for result in batch:
+            yield result
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-16 20:37
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+import events.constants
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_uid_subscription_uid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.UnaccentExtension(),
+        migrations.RunSQL(
+            sql=[
+                "CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);",
+                "ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent "
+                "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;",
+            ],
+            reverse_sql="DROP TEXT SEARCH CONFIGURATION portuguese_unaccent;",
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('title', config='portuguese_unaccent', weight='A'), '||', django.contrib.postgres.search.SearchVector('address', config='portuguese_unaccent', weight='B'), django.contrib.postgres.search.SearchConfig('portuguese_unaccent')), '||', django.contrib.postgres.search.SearchVector('description', config='portuguese_unaccent', weight='C'), django.contrib.postgres.search.SearchConfig('portuguese_unaccent')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AlterField(
+            model_name='subscriptionstatus',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(events.constants.TypeSubscriptionStatus['CREATED'], 'Created'), (events.constants.TypeSubscriptionStatus['CONFIRMED'], 'Confirmed'), (events.constants.TypeSubscriptionStatus['CANCELED'], 'Canceled'), (events.constants.TypeSubscriptionStatus['UNSIGNED'], 'Unsigned')], db_default=events.constants.TypeSubscriptionStatus['CREATED'], default=events.constants.TypeSubscriptionStatus['CREATED']),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='event_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.2 on 2026-10-16 20:38
+
+import events.constants
+from django.conf import settings
+from django.db import migrations, models
+
+SYNC_CURRENT_STATUS_SQL = """
+CREATE FUNCTION events_subscription_sync_current_status() RETURNS trigger AS $$
+BEGIN
+    UPDATE events_subscription
+    SET current_status = NEW.status, updated_at = NEW.created_at
+    WHERE id = NEW.subscription_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER events_subscriptionstatus_sync_current_status
+AFTER INSERT ON events_subscriptionstatus
+FOR EACH ROW EXECUTE FUNCTION events_subscription_sync_current_status();
+"""
+
+DROP_SYNC_CURRENT_STATUS_SQL = """
+DROP TRIGGER events_subscriptionstatus_sync_current_status ON events_subscriptionstatus;
+DROP FUNCTION events_subscription_sync_current_status();
+"""
+
+BACKFILL_CURRENT_STATUS_SQL = """
+UPDATE events_subscription es
+SET current_status = latest.status
+FROM (
+    SELECT DISTINCT ON (subscription_id) subscription_id, status
+    FROM events_subscriptionstatus
+    ORDER BY subscription_id, created_at DESC
+) latest
+WHERE latest.subscription_id = es.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='current_status',
+            field=models.PositiveSmallIntegerField(choices=[(events.constants.TypeSubscriptionStatus['CREATED'], 'Created'), (events.constants.TypeSubscriptionStatus['CONFIRMED'], 'Confirmed'), (events.constants.TypeSubscriptionStatus['CANCELED'], 'Canceled'), (events.constants.TypeSubscriptionStatus['UNSIGNED'], 'Unsigned')], db_default=events.constants.TypeSubscriptionStatus['CREATED'], default=events.constants.TypeSubscriptionStatus['CREATED']),
+        ),
+        migrations.RunSQL(BACKFILL_CURRENT_STATUS_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(SYNC_CURRENT_STATUS_SQL, reverse_sql=DROP_SYNC_CURRENT_STATUS_SQL),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['event', 'current_status'], name='subscription_event_status_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-16 20:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_subscription_current_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_at', 'id'], name='event_start_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['title', 'id'], name='event_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptionstatus',
+            index=models.Index(fields=['subscription', '-created_at'], name='subscription_status_latest_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.2 on 2026-10-16 20:45
+
+import django.db.models.deletion
+import django.db.models.functions.datetime
+import events.constants
+import utils.models
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_query_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendeeExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_default=django.db.models.functions.datetime.Now())),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('uid', models.UUIDField(db_default=utils.models.UUID4Generator(), db_index=True, default=uuid.uuid4, editable=False, unique=True)),
+                ('status', models.PositiveSmallIntegerField(choices=[(events.constants.TypeExportStatus['PENDING'], 'Pending'), (events.constants.TypeExportStatus['RUNNING'], 'Running'), (events.constants.TypeExportStatus['DONE'], 'Done'), (events.constants.TypeExportStatus['FAILED'], 'Failed')], db_default=events.constants.TypeExportStatus['PENDING'], default=events.constants.TypeExportStatus['PENDING'])),
+                ('total_rows', models.PositiveIntegerField(db_default=0, default=0)),
+                ('exported_rows', models.PositiveIntegerField(db_default=0, default=0)),
+                ('file', models.FileField(blank=True, upload_to='exports/')),
+                ('error', models.TextField(blank=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendee_exports', to='events.event')),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendee_exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'AttendeeExport',
+                'verbose_name_plural': 'AttendeeExports',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
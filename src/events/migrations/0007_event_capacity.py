@@ -0,0 +1,43 @@
+# Generated by Django 5.1.2 on 2026-10-16 21:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Subscriptions created (1) or confirmed (2) hold a seat, see events.constants.SEAT_HOLDING_STATUSES
+BACKFILL_SEATS_TAKEN_SQL = """
+UPDATE events_event AS event
+SET seats_taken = taken.total
+FROM (
+    SELECT event_id, COUNT(*) AS total
+    FROM events_subscription
+    WHERE current_status IN (1, 2)
+    GROUP BY event_id
+) AS taken
+WHERE taken.event_id = event.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_attendee_export'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='seats_taken',
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_SEATS_TAKEN_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.CheckConstraint(condition=models.Q(('capacity__isnull', True), ('seats_taken__lte', models.F('capacity')), _connector='OR'), name='event_seats_within_capacity'),
+        ),
+    ]
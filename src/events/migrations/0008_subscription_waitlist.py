@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-16 21:03
+
+import events.constants
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_capacity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscription',
+            name='current_status',
+            field=models.PositiveSmallIntegerField(choices=[(events.constants.TypeSubscriptionStatus['CREATED'], 'Created'), (events.constants.TypeSubscriptionStatus['CONFIRMED'], 'Confirmed'), (events.constants.TypeSubscriptionStatus['CANCELED'], 'Canceled'), (events.constants.TypeSubscriptionStatus['UNSIGNED'], 'Unsigned'), (events.constants.TypeSubscriptionStatus['WAITLISTED'], 'Waitlisted')], db_default=events.constants.TypeSubscriptionStatus['CREATED'], default=events.constants.TypeSubscriptionStatus['CREATED']),
+        ),
+        migrations.AlterField(
+            model_name='subscriptionstatus',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(events.constants.TypeSubscriptionStatus['CREATED'], 'Created'), (events.constants.TypeSubscriptionStatus['CONFIRMED'], 'Confirmed'), (events.constants.TypeSubscriptionStatus['CANCELED'], 'Canceled'), (events.constants.TypeSubscriptionStatus['UNSIGNED'], 'Unsigned'), (events.constants.TypeSubscriptionStatus['WAITLISTED'], 'Waitlisted')], db_default=events.constants.TypeSubscriptionStatus['CREATED'], default=events.constants.TypeSubscriptionStatus['CREATED']),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(condition=models.Q(('current_status', events.constants.TypeSubscriptionStatus['WAITLISTED'])), fields=['event', 'created_at', 'id'], name='subscription_waitlist_idx'),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.1.2 on 2026-10-16 21:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Status values of events.constants.TypeSubscriptionStatus: 1 created, 2 confirmed,
+# 3 canceled, 4 unsigned, 5 waitlisted
+COUNT_SUBSCRIPTIONS_SQL = """
+CREATE FUNCTION events_event_create_subscription_counts() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO events_eventsubscriptioncounts (event_id) VALUES (NEW.id)
+    ON CONFLICT (event_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER events_event_create_subscription_counts
+AFTER INSERT ON events_event
+FOR EACH ROW EXECUTE FUNCTION events_event_create_subscription_counts();
+
+CREATE FUNCTION events_subscription_count_status() RETURNS trigger AS $$
+BEGIN
+    -- Only decrements an existing row: while an event is deleted its counts may be gone already
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE events_eventsubscriptioncounts
+        SET created = created - (OLD.current_status = 1)::int,
+            confirmed = confirmed - (OLD.current_status = 2)::int,
+            canceled = canceled - (OLD.current_status = 3)::int,
+            unsigned = unsigned - (OLD.current_status = 4)::int,
+            waitlisted = waitlisted - (OLD.current_status = 5)::int
+        WHERE event_id = OLD.event_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO events_eventsubscriptioncounts AS counts (event_id, created, confirmed, canceled, unsigned, waitlisted)
+        VALUES (
+            NEW.event_id,
+            (NEW.current_status = 1)::int,
+            (NEW.current_status = 2)::int,
+            (NEW.current_status = 3)::int,
+            (NEW.current_status = 4)::int,
+            (NEW.current_status = 5)::int
+        )
+        ON CONFLICT (event_id) DO UPDATE
+        SET created = counts.created + EXCLUDED.created,
+            confirmed = counts.confirmed + EXCLUDED.confirmed,
+            canceled = counts.canceled + EXCLUDED.canceled,
+            unsigned = counts.unsigned + EXCLUDED.unsigned,
+            waitlisted = counts.waitlisted + EXCLUDED.waitlisted;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER events_subscription_count_insert_delete
+AFTER INSERT OR DELETE ON events_subscription
+FOR EACH ROW EXECUTE FUNCTION events_subscription_count_status();
+
+CREATE TRIGGER events_subscription_count_update
+AFTER UPDATE OF current_status, event_id ON events_subscription
+FOR EACH ROW
+WHEN (OLD.current_status IS DISTINCT FROM NEW.current_status OR OLD.event_id IS DISTINCT FROM NEW.event_id)
+EXECUTE FUNCTION events_subscription_count_status();
+"""
+
+DROP_COUNT_SUBSCRIPTIONS_SQL = """
+DROP TRIGGER events_subscription_count_update ON events_subscription;
+DROP TRIGGER events_subscription_count_insert_delete ON events_subscription;
+DROP FUNCTION events_subscription_count_status();
+DROP TRIGGER events_event_create_subscription_counts ON events_event;
+DROP FUNCTION events_event_create_subscription_counts();
+"""
+
+BACKFILL_COUNTS_SQL = """
+INSERT INTO events_eventsubscriptioncounts (event_id, created, confirmed, canceled, unsigned, waitlisted)
+SELECT
+    ee.id,
+    count(es.id) FILTER (WHERE es.current_status = 1),
+    count(es.id) FILTER (WHERE es.current_status = 2),
+    count(es.id) FILTER (WHERE es.current_status = 3),
+    count(es.id) FILTER (WHERE es.current_status = 4),
+    count(es.id) FILTER (WHERE es.current_status = 5)
+FROM events_event ee
+LEFT JOIN events_subscription es ON es.event_id = ee.id
+GROUP BY ee.id;
+"""
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_subscription_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSubscriptionCounts',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='subscription_counts', serialize=False, to='events.event')),
+                ('created', models.IntegerField(db_default=0, default=0)),
+                ('confirmed', models.IntegerField(db_default=0, default=0)),
+                ('canceled', models.IntegerField(db_default=0, default=0)),
+                ('unsigned', models.IntegerField(db_default=0, default=0)),
+                ('waitlisted', models.IntegerField(db_default=0, default=0)),
+            ],
+            options={
+                'verbose_name': 'EventSubscriptionCounts',
+                'verbose_name_plural': 'EventSubscriptionCounts',
+            },
+        ),
+        migrations.RunSQL(BACKFILL_COUNTS_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(COUNT_SUBSCRIPTIONS_SQL, reverse_sql=DROP_COUNT_SUBSCRIPTIONS_SQL),
+    ]
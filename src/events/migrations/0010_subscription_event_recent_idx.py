@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-16 21:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_event_subscription_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['event', '-created_at', '-id'], name='subscription_event_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-16 21:51
+
+import events.constants
+from django.conf import settings
+from django.db import migrations, models
+
+# Keeps the newest pending or running export of each event and user, the others could not be
+# told apart by the promoter anyway (status 4 is TypeExportStatus.FAILED)
+FAIL_DUPLICATE_EXPORTS_SQL = """
+UPDATE events_attendeeexport ea
+SET status = 4, error = 'Exportação duplicada', updated_at = now()
+WHERE ea.status IN (1, 2)
+  AND EXISTS (
+    SELECT 1 FROM events_attendeeexport newer
+    WHERE newer.event_id = ea.event_id
+      AND newer.requested_by_id = ea.requested_by_id
+      AND newer.status IN (1, 2)
+      AND newer.id > ea.id
+  );
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0010_subscription_event_recent_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(FAIL_DUPLICATE_EXPORTS_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='attendeeexport',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', [events.constants.TypeExportStatus['PENDING'], events.constants.TypeExportStatus['RUNNING']])), fields=('event', 'requested_by'), name='attendee_export_active_unique'),
+        ),
+    ]
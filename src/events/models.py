@@ -1,9 +1,17 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from utils.models import CreatedMixin
 
 from django.contrib.auth import get_user_model
-from events.constants import TypeSubscriptionStatus, TRANSLATED_SUBSCRIPTION_STATUS
+from events.constants import (
+    TypeSubscriptionStatus,
+    SEARCH_CONFIG,
+    TypeExportStatus,
+    TRANSLATED_EXPORT_STATUS,
+)
 from utils.models import UUID4Generator
+from events.utils import EVENT_SHAPE, SUBSCRIPTION_SHAPE
 from uuid import uuid4
 
 _User = get_user_model()
@@ -20,6 +28,11 @@ class Event(CreatedMixin):
         address (CharField): The address where the event will take place.
         start_at (DateTimeField): The date and time when the event starts.
         is_active (BooleanField): A flag indicating whether the event is active. Defaults to True.
+        capacity (PositiveIntegerField): Maximum number of subscribers, None for no limit.
+        seats_taken (PositiveIntegerField): Subscriptions currently holding a seat, only changed by
+            the conditional UPDATEs of events.subscriptions and never above capacity.
+        search_vector (GeneratedField): Weighted full-text document of title, address and description,
+            maintained by Postgres and indexed with GIN.
 
     Methods:
         __str__(): Returns the string representation of the event, which is its title.
@@ -47,27 +60,51 @@ class Event(CreatedMixin):
     address = models.CharField(max_length=255)
     start_at = models.DateTimeField()
     is_active = models.BooleanField(default=True, db_default=True)
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    seats_taken = models.PositiveIntegerField(default=0, db_default=0, editable=False)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("address", weight="B", config=SEARCH_CONFIG)
+            + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         verbose_name = "Event"
         verbose_name_plural = "Events"
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="event_search_vector_idx"),
+            # list_events: start_at >= now ordered by start_at/title, id as keyset tiebreaker
+            models.Index(fields=["start_at", "id"], name="event_start_at_id_idx"),
+            models.Index(fields=["title", "id"], name="event_title_id_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(capacity__isnull=True) | models.Q(seats_taken__lte=models.F("capacity")),
+                name="event_seats_within_capacity",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # A full save of an instance loaded before a ticket rush must not write back its stale seats_taken
+        if self.pk is not None and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated and field.name != "seats_taken"
+            ]
+        super().save(*args, **kwargs)
+
     def model_dump(self):
-        return {
-            "uid": self.uid,
-            "promoter": self.promoter.email,
-            "title": self.title,
-            "description": self.description,
-            "address": self.address,
-            "start_at": self.start_at,
-            "is_active": self.is_active,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-        }
+        # Reads promoter and subscription_counts, load them with select_related(*EVENT_SHAPE.related)
+        return EVENT_SHAPE.dump(self)
 
 
 class Subscription(CreatedMixin):
@@ -77,6 +114,8 @@ class Subscription(CreatedMixin):
     Args:
         user (ForeignKey): A reference to the user who subscribed to the event.
         event (ForeignKey): A reference to the event to which the user subscribed.
+        current_status (PositiveSmallIntegerField): The status of the latest SubscriptionStatus,
+            kept in sync by a database trigger whenever a SubscriptionStatus row is inserted.
 
     Methods:
         __str__(): Returns a string representation of the subscription.
@@ -106,6 +145,11 @@ class Subscription(CreatedMixin):
         on_delete=models.CASCADE,
         related_name="subscriptions",
     )
+    current_status = models.PositiveSmallIntegerField(
+        choices=TypeSubscriptionStatus.choices(),
+        default=TypeSubscriptionStatus.CREATED,
+        db_default=TypeSubscriptionStatus.CREATED,
+    )
 
     class Meta:
         verbose_name = "Subscription"
@@ -117,28 +161,33 @@ class Subscription(CreatedMixin):
                 name="unique_user_event_subscription",
             ),
         ]
+        indexes = [
+            models.Index(fields=["event", "current_status"], name="subscription_event_status_idx"),
+            # most recent subscribers of an event, see the dashboard and dashboard_subscribers
+            models.Index(fields=["event", "-created_at", "-id"], name="subscription_event_recent_idx"),
+            # waitlist of an event in arrival order, see events.subscriptions.promote_waitlist
+            models.Index(
+                fields=["event", "created_at", "id"],
+                condition=models.Q(current_status=TypeSubscriptionStatus.WAITLISTED),
+                name="subscription_waitlist_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.event}"
 
     def model_dump(self):
-        event = self.event
-        return {
-            "uid": self.uid,
-            "event__title": event.title,
-            "event__description": event.description,
-            "event__start_at": event.start_at,
-            "event__is_active": event.is_active,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-            "status": TRANSLATED_SUBSCRIPTION_STATUS[self.subscription_statuses.last().status],
-        }
+        # Reads event, load it with select_related(*SUBSCRIPTION_SHAPE.related) to avoid a lazy query
+        return SUBSCRIPTION_SHAPE.dump(self)
 
 
 class SubscriptionStatus(CreatedMixin):
     """
     Model representing the status of a subscription.
 
+    Inserting a row also sets Subscription.current_status (and updated_at) in the same
+    statement, through the events_subscriptionstatus_sync_current_status trigger.
+
     Args:
         subscription (ForeignKey): Foreign key to the Subscription model.
             Deletes related statuses when the subscription is deleted.
@@ -169,6 +218,136 @@ class SubscriptionStatus(CreatedMixin):
         verbose_name = "SubscriptionStatus"
         verbose_name_plural = "SubscriptionStatuses"
         ordering = ["-created_at"]
+        indexes = [
+            # latest status of a subscription
+            models.Index(fields=["subscription", "-created_at"], name="subscription_status_latest_idx"),
+        ]
 
     def __str__(self):
         return f"{self.subscription} - {self.status}"
+
+
+class EventSubscriptionCounts(models.Model):
+    """
+    Number of subscriptions of an event in each status, so that responses read them
+    without aggregating the subscriptions.
+
+    The row is inserted with the event and kept up to date in the same transaction as
+    every change of Subscription.current_status, by the triggers of the
+    0009_event_subscription_counts migration. events.tasks.counts.reconcile_subscription_counts
+    repairs any drift.
+
+    Args:
+        event (OneToOneField): The event, also the primary key.
+        created (IntegerField): Subscriptions in the CREATED status.
+        confirmed (IntegerField): Subscriptions in the CONFIRMED status.
+        canceled (IntegerField): Subscriptions in the CANCELED status.
+        unsigned (IntegerField): Subscriptions in the UNSIGNED status.
+        waitlisted (IntegerField): Subscriptions in the WAITLISTED status.
+
+    Meta:
+        verbose_name (str): Human-readable name for the model.
+        verbose_name_plural (str): Human-readable plural name for the model.
+    """
+
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="subscription_counts",
+    )
+    # Not Positive*: a drifted counter must not make a subscription fail, the reconciliation fixes it
+    created = models.IntegerField(default=0, db_default=0)
+    confirmed = models.IntegerField(default=0, db_default=0)
+    canceled = models.IntegerField(default=0, db_default=0)
+    unsigned = models.IntegerField(default=0, db_default=0)
+    waitlisted = models.IntegerField(default=0, db_default=0)
+
+    class Meta:
+        verbose_name = "EventSubscriptionCounts"
+        verbose_name_plural = "EventSubscriptionCounts"
+
+    def __str__(self):
+        return f"{self.event} - {self.created}/{self.confirmed}/{self.canceled}"
+
+
+class AttendeeExport(CreatedMixin):
+    """
+    An export of the attendee list of an event to a gzipped CSV file, built by
+    events.tasks.export.export_attendees.
+
+    Args:
+        event (ForeignKey): The exported event.
+        requested_by (ForeignKey): The promoter who requested the export.
+        status (PositiveSmallIntegerField): Progress of the job, with choices defined in TypeExportStatus.
+        total_rows (PositiveIntegerField): Number of subscriptions to export, known once the job starts.
+        exported_rows (PositiveIntegerField): Number of subscriptions written so far.
+        file (FileField): The CSV file under MEDIA_ROOT, set when the job is done.
+        error (TextField): Why the job failed.
+
+    Methods:
+        __str__(): Returns a string representation of the export.
+        model_dump(): Returns the export as a dictionary, including its progress.
+
+    Meta:
+        verbose_name (str): Human-readable name for the model.
+        verbose_name_plural (str): Human-readable plural name for the model.
+        ordering (list): Default ordering for the model, by creation date in descending order.
+        constraints (list): At most one pending or running export per event and user.
+    """
+
+    uid = models.UUIDField(
+        db_default=UUID4Generator(),
+        unique=True,
+        editable=False,
+        db_index=True,
+        default=uuid4,
+    )
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name="attendee_exports",
+    )
+    requested_by = models.ForeignKey(
+        _User,
+        on_delete=models.CASCADE,
+        related_name="attendee_exports",
+    )
+    status = models.PositiveSmallIntegerField(
+        choices=TypeExportStatus.choices(),
+        default=TypeExportStatus.PENDING,
+        db_default=TypeExportStatus.PENDING,
+    )
+    total_rows = models.PositiveIntegerField(default=0, db_default=0)
+    exported_rows = models.PositiveIntegerField(default=0, db_default=0)
+    file = models.FileField(upload_to="exports/", blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "AttendeeExport"
+        verbose_name_plural = "AttendeeExports"
+        ordering = ["-created_at"]
+        constraints = [
+            # One pending or running export per event and user, see create_attendee_export
+            models.UniqueConstraint(
+                fields=["event", "requested_by"],
+                condition=models.Q(status__in=[TypeExportStatus.PENDING, TypeExportStatus.RUNNING]),
+                name="attendee_export_active_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event} - {self.uid}"
+
+    def model_dump(self):
+        return {
+            "uid": self.uid,
+            "event": self.event.uid,
+            "status": TRANSLATED_EXPORT_STATUS[self.status],
+            "total_rows": self.total_rows,
+            "exported_rows": self.exported_rows,
+            "progress": round(self.exported_rows / self.total_rows, 3) if self.total_rows else 0,
+            "error": self.error or None,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
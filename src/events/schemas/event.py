@@ -9,12 +9,16 @@ class EventCreate(BaseModel):
     description: str
     start_at: datetime
     address: str
+    capacity: Optional[int] = None
 
     @model_validator(mode="after")
     def check_dates(self):
         if self.start_at < datetime.now():
             raise ValueError("Data de início não pode ser uma data passada")
 
+        if self.capacity is not None and self.capacity < 1:
+            raise ValueError("Capacidade deve ser maior que zero")
+
         return self
 
 
@@ -25,9 +29,12 @@ class EventUpdate(BaseModel):
     start_at: Optional[datetime] = None
     address: Optional[str] = None
     is_active: Optional[bool] = None
+    capacity: Optional[int] = None
 
     @model_validator(mode="after")
     def check_dates(self):
         if self.start_at and self.start_at < datetime.now():
             raise ValueError("Data de início não pode ser uma data passada")
+        if self.capacity is not None and self.capacity < 1:
+            raise ValueError("Capacidade deve ser maior que zero")
         return self
@@ -0,0 +1,43 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from events import cache as event_cache
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def track_promoter_email(sender, instance, update_fields=None, **kwargs):
+    """
+    Remembers whether the email of a user changes, the event detail embeds the promoter email.
+    """
+    instance._email_changed = False
+    if instance.pk is None or (update_fields is not None and "email" not in update_fields):
+        return
+
+    email = sender.objects.filter(pk=instance.pk).values_list("email", flat=True).first()
+    instance._email_changed = email is not None and email != instance.email
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_promoter_events(sender, instance, **kwargs):
+    """
+    Drops the cached detail of every event promoted by a user whose email changed, and the
+    list pages, which embed it too, once the write is committed: a reader must not cache the
+    previous email again in between.
+    """
+    if getattr(instance, "_email_changed", False):
+        uids = list(instance.events.values_list("uid", flat=True))
+        transaction.on_commit(partial(event_cache.delete_details, uids))
+        transaction.on_commit(event_cache.bump_list_generation)
+
+
+@receiver([post_save, post_delete], sender="events.Event")
+def invalidate_event_lists(sender, instance, **kwargs):
+    """
+    Drops every cached event list page once the write is committed, a reader must not
+    cache the previous rows under the new generation.
+    """
+    transaction.on_commit(event_cache.bump_list_generation)
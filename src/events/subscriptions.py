@@ -0,0 +1,219 @@
+from functools import partial
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Exists, F, OuterRef, Q
+
+from events import cache as event_cache
+from events.constants import SEAT_HOLDING_STATUSES, TypeSubscriptionStatus
+from events.models import Event, Subscription, SubscriptionStatus
+from events.utils import translate_subscription_status
+from sql import CREATE_SUBSCRIPTION
+from utils import metrics
+from utils.models import dict_fetchall
+from utils.tasks import create_periodic_task
+
+PROMOTION_SCHEDULED_KEY_PREFIX = "events:waitlist:scheduled:"
+# A promotion task that never ran stops coalescing the next ones after this many seconds
+PROMOTION_SCHEDULED_TTL = 60
+
+
+def subscribe(user, event_uid: UUID) -> Optional[dict]:
+    """
+    Subscribes a user to an event, taking one of its seats or joining its waitlist.
+
+    Everything happens in a single statement, CREATE_SUBSCRIPTION: it inserts the
+    subscription (ON CONFLICT DO NOTHING on unique_user_event_subscription), takes the
+    seat with a conditional UPDATE (seats_taken + 1 while below capacity and nobody is
+    waiting), inserts the CREATED or WAITLISTED status and returns the response columns.
+    A subscription that already exists, e.g. a retried request, is returned as is. A new
+    one drops the cached detail and list pages of the event once committed.
+
+    Args:
+        user (User): The subscriber.
+        event_uid (UUID): The uid of the event.
+
+    Returns:
+        Optional[dict]: The subscription in the SUBSCRIPTION_SHAPE format, plus "created"
+                        (False for an existing one), or None if the event does not exist.
+                        For an inactive event "uid" is None.
+    """
+    params = {
+        "event_uid": event_uid,
+        "user_id": user.id,
+        "created": TypeSubscriptionStatus.CREATED,
+        "waitlisted": TypeSubscriptionStatus.WAITLISTED,
+    }
+    with connections[router.db_for_write(Subscription)].cursor() as cursor:
+        for _ in range(2):
+            cursor.execute(CREATE_SUBSCRIPTION, params)
+            rows = dict_fetchall(cursor)
+            # uid is None when the INSERT ran into a subscription committed after the
+            # statement started, invisible to it: the second run sees it
+            if not rows or rows[0]["uid"] is not None or not rows[0]["event__is_active"]:
+                break
+
+    if not rows:
+        return None
+
+    subscription = rows[0]
+    if subscription["uid"] is not None:
+        if not subscription["created"]:
+            metrics.incr("subscriptions.existing")
+        else:
+            transaction.on_commit(partial(event_cache.invalidate_event, event_uid))
+            metrics.incr(
+                "subscriptions.waitlisted"
+                if subscription["status"] == TypeSubscriptionStatus.WAITLISTED
+                else "subscriptions.created"
+            )
+    subscription["status"] = translate_subscription_status(subscription["status"])
+    return subscription
+
+
+def unsubscribe(subscription: Subscription, status: int = TypeSubscriptionStatus.UNSIGNED) -> bool:
+    """
+    Unsubscribes (or cancels) a user from an event, giving back the seat of the
+    subscription. Once committed, a freed seat schedules the promotion of the waitlist and
+    the cached detail and list pages of the event are dropped.
+
+    The subscription row is locked so that two concurrent requests cannot both give the
+    seat back, only one user's row is locked, never the event.
+
+    Args:
+        subscription (Subscription): The subscription.
+        status (int, optional): UNSIGNED or CANCELED. Defaults to UNSIGNED.
+
+    Returns:
+        bool: False if the subscription was already unsigned or canceled.
+    """
+    with transaction.atomic():
+        current_status, event_uid = (
+            Subscription.objects.select_for_update(of=("self",))
+            .filter(pk=subscription.pk)
+            .values_list("current_status", "event__uid")
+            .get()
+        )
+        if current_status in (TypeSubscriptionStatus.UNSIGNED, TypeSubscriptionStatus.CANCELED):
+            return False
+
+        SubscriptionStatus.objects.create(subscription=subscription, status=status)
+        transaction.on_commit(partial(event_cache.invalidate_event, event_uid))
+        if current_status in SEAT_HOLDING_STATUSES:
+            freed = Event.objects.filter(pk=subscription.event_id, seats_taken__gt=0).update(
+                seats_taken=F("seats_taken") - 1,
+            )
+            if freed:
+                transaction.on_commit(lambda: schedule_promotion(subscription.event_id))
+
+    return True
+
+
+def schedule_promotion(event_id: int) -> None:
+    """
+    Enqueues promote_waitlist for an event, unless a run is already pending: a hundred
+    seats freed at once enqueue a single task, which promotes them all. A seat freed by a
+    run that failed, or never ran, is picked up by the promote_waitlists sweep.
+
+    Args:
+        event_id (int): The ID of the event.
+    """
+    # None: Redis is unavailable, scheduling twice is cheaper than never promoting
+    if cache.add(f"{PROMOTION_SCHEDULED_KEY_PREFIX}{event_id}", 1, PROMOTION_SCHEDULED_TTL) is False:
+        return
+
+    create_periodic_task(
+        name=f"Promote waitlist of event {event_id} ({uuid4()})",
+        task="events.tasks.waitlist.promote_waitlist",
+        args=[event_id],
+    )
+
+
+def _promote_batch(event_id: int) -> List[int]:
+    with transaction.atomic():
+        # Serializes the promoters of the event, the free seats cannot change under us
+        event = (
+            Event.objects.select_for_update()
+            .filter(pk=event_id, is_active=True)
+            .values("uid", "capacity", "seats_taken")
+            .first()
+        )
+        if event is None:
+            return []
+
+        limit = settings.WAITLIST_PROMOTION_BATCH_SIZE
+        if event["capacity"] is not None:
+            limit = min(limit, event["capacity"] - event["seats_taken"])
+        if limit <= 0:
+            return []
+
+        # skip_locked: a waitlisted user unsubscribing right now holds its row (and then
+        # waits for the event row we hold), waiting for it would deadlock
+        subscription_ids = list(
+            Subscription.objects.select_for_update(skip_locked=True)
+            .filter(event_id=event_id, current_status=TypeSubscriptionStatus.WAITLISTED)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not subscription_ids:
+            return []
+
+        SubscriptionStatus.objects.bulk_create(
+            [
+                SubscriptionStatus(subscription_id=subscription_id, status=TypeSubscriptionStatus.CREATED)
+                for subscription_id in subscription_ids
+            ]
+        )
+        Event.objects.filter(pk=event_id).update(seats_taken=F("seats_taken") + len(subscription_ids))
+        transaction.on_commit(partial(event_cache.invalidate_event, event["uid"]))
+
+    return subscription_ids
+
+
+def promote_waitlist(event_id: int) -> int:
+    """
+    Gives the free seats of an event to its waitlist, oldest subscription first.
+
+    Each batch of up to WAITLIST_PROMOTION_BATCH_SIZE subscriptions is promoted in its own
+    transaction, holding the event row: one bulk insert of CREATED statuses (the trigger
+    updates current_status) and one UPDATE of seats_taken, whatever the batch size.
+    Running it twice, or from several workers at once, promotes nobody twice: a run that
+    finds no free seat or no waitlisted subscription does nothing.
+
+    Args:
+        event_id (int): The ID of the event.
+
+    Returns:
+        int: The number of promoted subscriptions.
+    """
+    promoted = 0
+    while subscription_ids := _promote_batch(event_id):
+        promoted += len(subscription_ids)
+        metrics.incr("subscriptions.promoted", len(subscription_ids))
+    return promoted
+
+
+def promote_waitlists() -> dict:
+    """
+    Promotes the waitlist of every active event that has both free seats and waitlisted
+    subscriptions, whatever freed the seats. It catches up on the promotions that
+    schedule_promotion missed: a failed or lost task, or a capacity raised by the promoter.
+
+    Returns:
+        dict: The number of promoted subscriptions by event ID, only for the events that had any.
+    """
+    waitlisted = Subscription.objects.filter(event=OuterRef("pk"), current_status=TypeSubscriptionStatus.WAITLISTED)
+    event_ids = (
+        Event.objects.filter(Q(capacity__isnull=True) | Q(seats_taken__lt=F("capacity")), is_active=True)
+        .filter(Exists(waitlisted))
+        .values_list("id", flat=True)
+    )
+
+    promoted = {}
+    for event_id in event_ids:
+        if count := promote_waitlist(event_id):
+            promoted[event_id] = count
+    return promoted
@@ -0,0 +1,4 @@
+from .event import send_notification_by_cancell
+from .export import export_attendees
+from .waitlist import promote_waitlist, promote_waitlists
+from .counts import reconcile_subscription_counts
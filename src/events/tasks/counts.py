@@ -0,0 +1,72 @@
+from typing import Optional
+
+from functools import partial
+
+from celery import shared_task
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from events import cache as event_cache
+from events.constants import SUBSCRIPTION_COUNT_FIELDS
+from events.models import Event, EventSubscriptionCounts, Subscription
+from utils import metrics
+
+
+def _actual_counts(subscriptions_lookup: str = "") -> dict:
+    return {
+        field: Count(f"{subscriptions_lookup}id", filter=Q(**{f"{subscriptions_lookup}current_status": status}))
+        for status, field in SUBSCRIPTION_COUNT_FIELDS.items()
+    }
+
+
+@shared_task
+def reconcile_subscription_counts(event_id: Optional[int] = None) -> dict:
+    """
+    Repairs the EventSubscriptionCounts that drifted from the subscriptions, e.g. after a
+    manual fix in the database or a restore.
+
+    A single aggregate finds the drifted events (and creates the missing rows). Each one
+    is then fixed in its own short transaction: the counts row is locked first, so every
+    transition already counted has committed and is visible to the recount, and every
+    later one waits and adds its delta on top of it. The cached detail and list pages of a
+    repaired event are invalidated once its transaction commits.
+
+    Args:
+        event_id (int, optional): Only reconcile this event, None checks every event.
+
+    Returns:
+        dict: The number of events found without a counts row, created unless a concurrent
+        run (or the trigger) did it first, and the number of repaired rows.
+
+    Example:
+        >>> reconcile_subscription_counts()
+        {"missing": 0, "repaired": 2}
+    """
+    events = Event.objects.all() if event_id is None else Event.objects.filter(id=event_id)
+
+    missing = list(events.filter(subscription_counts__isnull=True).values_list("id", flat=True))
+    # With ignore_conflicts every object is returned, inserted or not: only the missing rows are known
+    EventSubscriptionCounts.objects.bulk_create(
+        [EventSubscriptionCounts(event_id=missing_id) for missing_id in missing],
+        ignore_conflicts=True,
+    )
+
+    actual = _actual_counts("subscriptions__")
+    drifted = list(
+        events.annotate(**{f"actual_{field}": expression for field, expression in actual.items()})
+        .filter(
+            Q(*[~Q(**{f"subscription_counts__{field}": F(f"actual_{field}")}) for field in actual], _connector=Q.OR)
+        )
+        .values_list("id", "uid")
+    )
+
+    for drifted_id, drifted_uid in drifted:
+        with transaction.atomic():
+            counts = EventSubscriptionCounts.objects.select_for_update().get(event_id=drifted_id)
+            for field, value in Subscription.objects.filter(event_id=drifted_id).aggregate(**_actual_counts()).items():
+                setattr(counts, field, value)
+            counts.save()
+            transaction.on_commit(partial(event_cache.invalidate_event, drifted_uid))
+
+    metrics.incr("subscriptions.counts_repaired", len(drifted))
+    return {"missing": len(missing), "repaired": len(drifted)}
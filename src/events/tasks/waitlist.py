@@ -0,0 +1,40 @@
+from celery import shared_task
+from django.core.cache import cache
+
+from events import subscriptions
+
+
+@shared_task
+def promote_waitlist(event_id: int) -> dict:
+    """
+    Promotes the waitlist of an event, see events.subscriptions.promote_waitlist.
+
+    Args:
+        event_id (int): The ID of the event.
+
+    Returns:
+        dict: The number of promoted subscriptions.
+
+    Example:
+        >>> promote_waitlist(1)
+        {"promoted": 120}
+    """
+    # Seats freed from now on schedule a new run
+    cache.delete(f"{subscriptions.PROMOTION_SCHEDULED_KEY_PREFIX}{event_id}")
+    return {"promoted": subscriptions.promote_waitlist(event_id)}
+
+
+@shared_task
+def promote_waitlists() -> dict:
+    """
+    Promotes the waitlist of every event with free seats, see events.subscriptions.promote_waitlists.
+
+    Returns:
+        dict: The number of promoted subscriptions and of events that had any.
+
+    Example:
+        >>> promote_waitlists()
+        {"promoted": 3, "events": 1}
+    """
+    promoted = subscriptions.promote_waitlists()
+    return {"promoted": sum(promoted.values()), "events": len(promoted)}
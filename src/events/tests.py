@@ -1,3 +1,938 @@
-from django.test import TestCase
+import csv
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from gzip import compress, decompress
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Barrier, get_ident
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connection, connections, router
+from django.db.models.functions import Now
+from django.http import JsonResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from orjson import OPT_APPEND_NEWLINE, dumps, loads
+
+from accounts import cache as auth_cache
+from accounts.tokens import issue_token
+from dashboards.utils import fetch_dashboards_events_sql
+from events import cache as event_cache
+from events.constants import TRANSLATED_SUBSCRIPTION_STATUS, TypeExportStatus, TypeSubscriptionStatus
+from events.filters import EventParams, SubscriptionParams
+from events.importer import bulk_create_events
+from events.models import AttendeeExport, Event, EventSubscriptionCounts, Subscription, SubscriptionStatus
+from events.subscriptions import promote_waitlist, promote_waitlists, schedule_promotion, subscribe, unsubscribe
+from events.tasks.counts import reconcile_subscription_counts
+from events.tasks.export import ATTENDEE_EXPORT_HEADER, export_attendees
+from events.views.event import aimport_events
+from events.views.export import adownload_attendee_export
+from utils.cache import get_or_set_locked
+from utils.middleware import CompressionMiddleware
+from utils.routers import ReplicaRoutingMiddleware, sticky_key
+from utils.streaming import iter_json_array, iter_ndjson
+
+_User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "auth": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "auth"},
+}
+
+
+# The async routes of core.asgi (API_ASYNC_VIEWS), which are picked when the urls are imported
+urlpatterns = [
+    path("api/v1/events/import/", aimport_events),
+    path("api/v1/events/<uuid:event_uid>/exports/<uuid:export_uid>/download/", adownload_attendee_export),
+]
+
+
+def create_event(promoter, **fields) -> Event:
+    return Event.objects.create(
+        promoter=promoter,
+        title=fields.pop("title", "Test event"),
+        description="description",
+        address="address",
+        start_at=datetime.now() + timedelta(days=1),
+        **fields,
+    )
+
+
+def event_row(**fields) -> dict:
+    return {"title": "Imported", "description": "d", "address": "a", "start_at": "2030-01-01T10:00:00", **fields}
+
+
+def create_users(prefix: str, count: int) -> list:
+    return _User.objects.bulk_create(
+        [_User(email=f"{prefix}-{index}@example.com", password="!") for index in range(count)]
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SeatAllocationTests(TransactionTestCase):
+    """
+    N subscribers race for the K seats of an event, each in its own thread and database
+    connection. With the pool enabled only DATABASE_POOL_MAX_SIZE of them run at once.
+    """
+
+    seats = 5
+    subscribers = 20
+
+    def setUp(self):
+        cache.clear()
+        self.promoter = _User.objects.create_user(email="promoter@example.com")
+        self.event = create_event(self.promoter, capacity=self.seats)
+
+    def subscribe_concurrently(self, users: list) -> list:
+        barrier = Barrier(len(users))
+
+        def attempt(user) -> str:
+            try:
+                barrier.wait()
+                return subscribe(user, self.event.uid)["status"]
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=len(users)) as executor:
+            return list(executor.map(attempt, users))
+
+    def test_exactly_k_subscribers_get_a_seat(self):
+        statuses = self.subscribe_concurrently(create_users("seats", self.subscribers))
+
+        self.event.refresh_from_db()
+        created = TRANSLATED_SUBSCRIPTION_STATUS[TypeSubscriptionStatus.CREATED]
+        waitlisted = TRANSLATED_SUBSCRIPTION_STATUS[TypeSubscriptionStatus.WAITLISTED]
+        self.assertEqual(statuses.count(created), self.seats)
+        self.assertEqual(statuses.count(waitlisted), self.subscribers - self.seats)
+        self.assertEqual(self.event.seats_taken, self.seats)
+        self.assertEqual(
+            Subscription.objects.filter(event=self.event, current_status=TypeSubscriptionStatus.CREATED).count(),
+            self.seats,
+        )
+
+    def test_unsubscribe_gives_the_seat_back_once(self):
+        [user] = create_users("unsubscribe", 1)
+        subscribe(user, self.event.uid)
+        subscription = Subscription.objects.get(user=user, event=self.event)
+
+        self.assertTrue(unsubscribe(subscription))
+        self.assertFalse(unsubscribe(subscription))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 0)
+
+    def test_seat_changes_invalidate_the_cached_detail_and_list(self):
+        event_params = EventParams()
+        self.assertEqual(event_cache.get_detail(self.event.uid)[0].count(b'"seats_taken":0'), 1)
+        list_etag = event_cache.list_etag(event_params)
+
+        [user] = create_users("invalidate", 1)
+        subscribe(user, self.event.uid)
+        self.assertIn(b'"seats_taken":1', event_cache.get_detail(self.event.uid)[0])
+        self.assertNotEqual(event_cache.list_etag(event_params), list_etag)
+
+        list_etag = event_cache.list_etag(event_params)
+        subscription_etag = event_cache.subscription_list_etag(SubscriptionParams(), [])
+        unsubscribe(Subscription.objects.get(user=user, event=self.event))
+        self.assertIn(b'"seats_taken":0', event_cache.get_detail(self.event.uid)[0])
+        self.assertNotEqual(event_cache.list_etag(event_params), list_etag)
+        self.assertNotEqual(event_cache.subscription_list_etag(SubscriptionParams(), []), subscription_etag)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, WAITLIST_PROMOTION_BATCH_SIZE=3)
+class WaitlistPromotionTests(TransactionTestCase):
+    """
+    Promotion of the waitlist once seats are freed, in small batches so that concurrent
+    promoters interleave.
+    """
+
+    seats = 5
+    subscribers = 20
+
+    def setUp(self):
+        cache.clear()
+        self.promoter = _User.objects.create_user(email="promoter@example.com")
+        self.event = create_event(self.promoter, capacity=self.seats)
+        # One at a time: the waitlist order is the subscription order
+        self.users = create_users("waitlist", self.subscribers)
+        for user in self.users:
+            subscribe(user, self.event.uid)
+
+    def free_seats(self, count: int) -> None:
+        Event.objects.filter(pk=self.event.pk).update(capacity=self.seats + count)
+
+    def statuses(self) -> list:
+        return list(
+            Subscription.objects.filter(event=self.event)
+            .order_by("created_at", "id")
+            .values_list("current_status", flat=True)
+        )
+
+    def test_oldest_waitlisted_subscriptions_are_promoted_first(self):
+        self.free_seats(4)
+
+        self.assertEqual(promote_waitlist(self.event.id), 4)
+        created, waitlisted = TypeSubscriptionStatus.CREATED, TypeSubscriptionStatus.WAITLISTED
+        self.assertEqual(self.statuses(), [created] * 9 + [waitlisted] * 11)
+
+    def test_promoting_again_promotes_nobody_twice(self):
+        self.free_seats(4)
+
+        self.assertEqual(promote_waitlist(self.event.id), 4)
+        self.assertEqual(promote_waitlist(self.event.id), 0)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 9)
+
+    def test_concurrent_promoters_fill_the_free_seats_once(self):
+        self.free_seats(10)
+        barrier = Barrier(4)
+
+        def attempt(_) -> int:
+            try:
+                barrier.wait()
+                return promote_waitlist(self.event.id)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            promoted = sum(executor.map(attempt, range(4)))
+
+        self.event.refresh_from_db()
+        self.assertEqual(promoted, 10)
+        self.assertEqual(self.event.seats_taken, 15)
+        self.assertEqual(self.statuses().count(TypeSubscriptionStatus.WAITLISTED), 5)
+
+    def test_sweep_promotes_events_with_free_seats(self):
+        full = create_event(self.promoter, title="Full event", capacity=1)
+        for user in self.users[:2]:
+            subscribe(user, full.uid)
+        self.free_seats(2)
+
+        self.assertEqual(promote_waitlists(), {self.event.id: 2})
+        self.assertEqual(promote_waitlists(), {})
+
+    def test_promotion_is_scheduled_without_redis(self):
+        with (
+            mock.patch.object(cache, "add", return_value=None),
+            mock.patch("events.subscriptions.create_periodic_task") as create_periodic_task,
+        ):
+            schedule_promotion(self.event.id)
+
+        create_periodic_task.assert_called_once()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SubscriptionCountsTests(TestCase):
+    """
+    The triggers of the 0009_event_subscription_counts migration and the reconciliation
+    task that repairs their drift.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.promoter = _User.objects.create_user(email="promoter@example.com")
+        self.event = create_event(self.promoter)
+        self.users = create_users("counts", 3)
+
+    def assertCounts(self, **expected):
+        counts = EventSubscriptionCounts.objects.get(event=self.event)
+        self.assertEqual(
+            {
+                field: getattr(counts, field)
+                for field in ("created", "confirmed", "canceled", "unsigned", "waitlisted")
+            },
+            {"created": 0, "confirmed": 0, "canceled": 0, "unsigned": 0, "waitlisted": 0, **expected},
+        )
+
+    def test_event_insert_creates_the_counts_row(self):
+        self.assertCounts()
+
+    def test_subscription_insert_counts_its_status(self):
+        Subscription.objects.create(user=self.users[0], event=self.event)
+        Subscription.objects.create(
+            user=self.users[1], event=self.event, current_status=TypeSubscriptionStatus.WAITLISTED
+        )
+        self.assertCounts(created=1, waitlisted=1)
+
+    def test_status_change_moves_the_count(self):
+        subscription = Subscription.objects.create(user=self.users[0], event=self.event)
+        SubscriptionStatus.objects.create(subscription=subscription, status=TypeSubscriptionStatus.CONFIRMED)
+        self.assertCounts(confirmed=1)
+
+        # The same status again is not a transition
+        SubscriptionStatus.objects.create(subscription=subscription, status=TypeSubscriptionStatus.CONFIRMED)
+        self.assertCounts(confirmed=1)
+
+    def test_subscription_delete_uncounts_it(self):
+        subscription = Subscription.objects.create(user=self.users[0], event=self.event)
+        Subscription.objects.create(user=self.users[1], event=self.event)
+        subscription.delete()
+        self.assertCounts(created=1)
+
+    def test_reconciliation_repairs_drift_and_invalidates_the_event(self):
+        Subscription.objects.create(user=self.users[0], event=self.event)
+        EventSubscriptionCounts.objects.filter(event=self.event).update(created=7, canceled=2)
+        list_etag = event_cache.list_etag(EventParams())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reconcile_subscription_counts(), {"missing": 0, "repaired": 1})
+
+        self.assertCounts(created=1)
+        self.assertNotEqual(event_cache.list_etag(EventParams()), list_etag)
+        self.assertEqual(reconcile_subscription_counts(), {"missing": 0, "repaired": 0})
+
+    def test_reconciliation_creates_missing_rows(self):
+        Subscription.objects.create(user=self.users[0], event=self.event)
+        EventSubscriptionCounts.objects.filter(event=self.event).delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reconcile_subscription_counts(self.event.id), {"missing": 1, "repaired": 1})
+
+        self.assertCounts(created=1)
+
+
+class ListFingerprintTests(SimpleTestCase):
+    """
+    The default start_at of the lists is part of their page keys and ETags, it must be
+    the same in every worker process.
+    """
+
+    def test_default_start_at_is_the_current_minute(self):
+        with mock.patch("events.filters.datetime") as mocked:
+            mocked.now.return_value = datetime(2030, 1, 1, 10, 0, 5, 123)
+            first = EventParams()
+            mocked.now.return_value = datetime(2030, 1, 1, 10, 0, 55)
+            second = EventParams()
+            subscription_params = SubscriptionParams()
+
+        self.assertEqual(first.start_at, datetime(2030, 1, 1, 10, 0))
+        self.assertEqual(event_cache.list_fingerprint(first), event_cache.list_fingerprint(second))
+        self.assertEqual(subscription_params.start_at, datetime(2030, 1, 1, 10, 0))
+
+    def test_explicit_start_at_is_kept(self):
+        event_params = EventParams(start_at="2030-01-01T10:00:05")
+        self.assertEqual(event_params.start_at, datetime(2030, 1, 1, 10, 0, 5))
+        self.assertNotEqual(event_cache.list_fingerprint(event_params), event_cache.list_fingerprint(EventParams()))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GetOrSetLockedTests(SimpleTestCase):
+    """
+    The stampede lock behind the event detail and list caches, see utils.cache.get_or_set_locked.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.loader = mock.Mock(return_value=None)
+
+    def test_cold_miss_without_redis_loads_directly(self):
+        # django-redis with IGNORE_EXCEPTIONS returns None from add() when Redis is down
+        with mock.patch.object(cache, "add", return_value=None), mock.patch("utils.cache.sleep") as sleep:
+            self.assertIsNone(get_or_set_locked("key", self.loader, ttl=30))
+
+        sleep.assert_not_called()
+        self.loader.assert_called_once()
+
+    def test_loser_stops_waiting_when_the_lock_is_released(self):
+        cache.set("key:lock", 1)
+
+        # The winner finds nothing to store and releases the lock during the first wait
+        with mock.patch("utils.cache.sleep", side_effect=lambda _: cache.delete("key:lock")) as sleep:
+            self.assertIsNone(get_or_set_locked("key", self.loader, ttl=30))
+
+        sleep.assert_called_once()
+        self.loader.assert_called_once()
+
+    def test_loser_reads_the_value_stored_by_the_winner(self):
+        cache.set("key:lock", 1)
+
+        with mock.patch("utils.cache.sleep", side_effect=lambda _: cache.set("key", ("value", 0))):
+            self.assertEqual(get_or_set_locked("key", self.loader, ttl=30), "value")
+
+        self.loader.assert_not_called()
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """
+    The sync and async paths of utils.middleware.CompressionMiddleware.
+    """
+
+    def setUp(self):
+        self.request = RequestFactory().get("/", headers={"accept-encoding": "gzip"})
+        self.body = {"events": [{"title": f"Event {index}"} for index in range(5000)]}
+
+    def test_sync_path(self):
+        middleware = CompressionMiddleware(lambda request: JsonResponse(self.body))
+
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertEqual(middleware(self.request)["Content-Encoding"], "gzip")
+
+    @override_settings(COMPRESSION_ENCODINGS=["gzip"], COMPRESSION_OFFLOAD_SIZE=1024)
+    def test_async_path_compresses_large_bodies_off_the_event_loop(self):
+        threads = []
+
+        async def get_response(request):
+            threads.append(get_ident())
+            return JsonResponse(self.body)
+
+        middleware = CompressionMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        with mock.patch.object(middleware, "compress", side_effect=lambda *args: threads.append(get_ident())):
+            async_to_sync(middleware)(self.request)
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotEqual(threads[0], threads[1])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """
+    The async path of utils.routers.ReplicaRoutingMiddleware, with the views run by
+    sync_to_async as the async views of core.asgi do.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory(headers={"authorization": "Bearer token"})
+
+    def route(self, request, write: bool = False) -> str:
+        def view():
+            if write:
+                router.db_for_write(Subscription)
+            return JsonResponse({"db": router.db_for_read(Event)})
+
+        async def get_response(request):
+            return await sync_to_async(view)()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        return async_to_sync(middleware)(request).content
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.route(self.factory.get("/")), b'{"db": "replica"}')
+
+    def test_a_write_keeps_the_client_on_the_primary(self):
+        self.assertEqual(self.route(self.factory.post("/"), write=True), b'{"db": "default"}')
+        self.assertTrue(cache.get(sticky_key(self.factory.get("/"))))
+        self.assertEqual(self.route(self.factory.get("/")), b'{"db": "default"}')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryCountTests(TestCase):
+    """
+    Queries run by the write and detail endpoints, once the user is authenticated from
+    the cache: a change here is a regression of the single round trip shapes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        auth_cache._local_users.clear()
+        self.promoter = _User.objects.create_user(email="promoter@example.com")
+        self.event = create_event(self.promoter, capacity=10)
+        self.client = Client(headers={"authorization": f"Bearer {issue_token(self.promoter)}"})
+        # Caches the user, the counts below are those of the endpoints
+        self.client.get("/api/v1/accounts/me/")
+
+    def test_create_event(self):
+        body = {"title": "New event", "description": "d", "address": "a", "start_at": "2030-01-01T10:00:00"}
+        with self.assertNumQueries(1):
+            response = self.client.post("/api/v1/events/create/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["subscriptions_created"], 0)
+
+    def test_detail_event(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/v1/events/{self.event.uid}/detail/")
+        self.assertEqual(response.status_code, 200)
+
+        # Served from the cache
+        with self.assertNumQueries(0):
+            self.client.get(f"/api/v1/events/{self.event.uid}/detail/")
+
+    def test_update_event(self):
+        # The read and the UPDATE, inside the SAVEPOINT/RELEASE of atomic() under TestCase
+        with self.assertNumQueries(4):
+            response = self.client.put(
+                f"/api/v1/events/{self.event.uid}/update/", {"title": "Renamed"}, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_subscription(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                "/api/v1/subscriptions/create/", {"event_uid": str(self.event.uid)}, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_subscription_not_modified(self):
+        response = self.client.get("/api/v1/subscriptions/list/?limit=5")
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/api/v1/subscriptions/list/?limit=5", headers={"if-none-match": response["ETag"]}
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_subscription(self):
+        subscription = Subscription.objects.create(user=self.promoter, event=self.event)
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/v1/subscriptions/{subscription.uid}/detail/")
+        self.assertEqual(response.status_code, 200)
+
+
+def _index_names(plan: dict) -> set:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAINs the hot queries of the API, built the way the views build them, and checks
+    that the planner picks the expected indexes on analyzed tables of a realistic shape.
+    """
+
+    events = 2000
+    users = 200
+    subscriptions_per_user = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        promoter = _User.objects.create_user(email="promoter@example.com")
+        now = datetime.now()
+        events = Event.objects.bulk_create(
+            [
+                Event(
+                    promoter=promoter,
+                    title=f"Evento {index}",
+                    description="description",
+                    address="São João" if index % 100 == 0 else "address",
+                    start_at=now + timedelta(hours=index - cls.events // 2),
+                )
+                for index in range(cls.events)
+            ]
+        )
+        # A popular event, subscribed by every user, next to events with a couple of subscribers
+        cls.event = events[cls.events // 2]
+        users = create_users("plans", cls.users)
+        subscriptions = Subscription.objects.bulk_create(
+            [Subscription(user=user, event=cls.event) for user in users]
+            + [
+                Subscription(user=user, event=events[(user_index * 7 + index * 97) % (cls.events // 2)])
+                for user_index, user in enumerate(users)
+                for index in range(cls.subscriptions_per_user)
+            ]
+        )
+        SubscriptionStatus.objects.bulk_create(
+            [SubscriptionStatus(subscription=subscription) for subscription in subscriptions]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE events_event, events_subscription, events_subscriptionstatus, accounts_user")
+
+    def setUp(self):
+        # The tables are still small enough for a sequential scan to beat some of the
+        # indexes, the test is about which index the planner picks
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, sql: str, params, expected: set) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = loads(plan)
+
+        used = _index_names(plan[0]["Plan"])
+        self.assertTrue(used & expected, f"uses {sorted(used) or 'no index'}, expected one of {sorted(expected)}")
+
+    def assertQuerysetUsesIndex(self, queryset, expected: set) -> None:
+        self.assertUsesIndex(*queryset.query.sql_with_params(), expected)
+
+    def test_list_events_by_start_at(self):
+        events = Event.objects.filter(EventParams().params).order_by("start_at", "id")[:10]
+        self.assertQuerysetUsesIndex(events, {"event_start_at_id_idx"})
+
+    def test_list_events_by_title(self):
+        events = Event.objects.filter(EventParams().params).order_by("title", "id")[:10]
+        self.assertQuerysetUsesIndex(events, {"event_title_id_idx", "event_start_at_id_idx"})
+
+    def test_list_events_search(self):
+        search_query = EventParams(search="São João").search_query
+        self.assertQuerysetUsesIndex(Event.objects.filter(search_vector=search_query), {"event_search_vector_idx"})
+
+    def test_list_subscription(self):
+        subscriptions = Subscription.objects.filter(SubscriptionParams().params).order_by("event__start_at", "id")[:10]
+        self.assertQuerysetUsesIndex(subscriptions, {"event_start_at_id_idx"})
+
+    def test_latest_subscription_status(self):
+        statuses = SubscriptionStatus.objects.filter(subscription_id=1).order_by("-created_at")[:1]
+        self.assertQuerysetUsesIndex(statuses, {"subscription_status_latest_idx"})
+
+    def test_dashboard(self):
+        sql = fetch_dashboards_events_sql()
+        self.assertUsesIndex(sql, (10, 0), {"event_start_at_id_idx"})
+        self.assertUsesIndex(sql, (10, 0), {"subscription_event_recent_idx"})
+
+    def test_dashboard_subscribers_page(self):
+        subscribers = (
+            Subscription.objects.filter(event=self.event, created_at__lte=datetime.now())
+            .order_by("-created_at", "-id")
+            .values("uid", "user__email")[:50]
+        )
+        self.assertQuerysetUsesIndex(subscribers, {"subscription_event_recent_idx"})
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ROOT_URLCONF="events.tests", EVENT_IMPORT_BATCH_SIZE=100)
+class AsyncStreamingTests(TestCase):
+    """
+    The streamed responses of the async views must reach the client as they are produced,
+    the ASGI handler reads a sync iterator whole before sending the first byte.
+    """
+
+    def setUp(self):
+        cache.clear()
+        auth_cache._local_users.clear()
+        self.promoter = _User.objects.create_user(email="promoter@example.com")
+        self.headers = {"authorization": f"Bearer {issue_token(self.promoter)}"}
+
+    async def test_import_streams_batches(self):
+        body = b"".join(dumps(event_row(), option=OPT_APPEND_NEWLINE) for _ in range(400))
+        response = await self.async_client.post(
+            "/api/v1/events/import/", body, content_type="application/x-ndjson", headers=self.headers
+        )
+        self.assertTrue(response.is_async)
+
+        chunks = aiter(response.streaming_content)
+        first = await anext(chunks)
+        # The first chunk is sent once it holds ~16 KB of results, before the last batch is inserted
+        self.assertLess(await Event.objects.filter(promoter=self.promoter).acount(), 400)
+        self.assertTrue(all(loads(line)["success"] for line in first.splitlines()))
+
+        rest = b"".join([chunk async for chunk in chunks])
+        self.assertEqual(loads((first + rest).splitlines()[-1]), {"success": True, "created": 400, "failed": 0})
+        self.assertEqual(await Event.objects.filter(promoter=self.promoter).acount(), 400)
+
+    async def test_download_streams_file(self):
+        content = compress(b"email,subscription_uid,status,created_at,updated_at\n" * 10000)
+        with TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            export = await sync_to_async(self._finished_export)(content)
+            response = await self.async_client.get(
+                f"/api/v1/events/{export.event.uid}/exports/{export.uid}/download/", headers=self.headers
+            )
+            self.assertTrue(response.is_async)
+            self.assertEqual(response["Content-Length"], str(len(content)))
+            self.assertIn("attachment", response["Content-Disposition"])
+            self.assertEqual(b"".join([chunk async for chunk in response.streaming_content]), content)
+
+    def _finished_export(self, content: bytes) -> AttendeeExport:
+        export = AttendeeExport(event=create_event(self.promoter), requested_by=self.promoter)
+        export.status = TypeExportStatus.DONE
+        export.file.save("attendees.csv.gz", ContentFile(content))
+        return export
+
+
+class StreamingParserTests(SimpleTestCase):
+    """
+    The upload parsers of utils.streaming, fed in chunks as small as one byte so every
+    value is split across chunk boundaries.
+    """
+
+    rows = [
+        {"title": "Événement 🎉", "escaped": 'a"b\\c\u00e9', "n": -1.5e10, "flags": [True, False, None]},
+        {"nested": {"list": [1, [2, {}]], "empty": ""}},
+        12345,
+    ]
+
+    def test_ndjson(self):
+        body = b"".join(dumps(row, option=OPT_APPEND_NEWLINE) for row in self.rows)
+        self.assertEqual(list(iter_ndjson(BytesIO(body))), list(enumerate(self.rows, 1)))
+
+    def test_ndjson_invalid_and_blank_lines(self):
+        result = list(iter_ndjson(BytesIO(b'{"a": 1}\n\n{"a": 1x}\n  \n{"a": 2}')))
+        self.assertEqual([line for line, _ in result], [1, 3, 5])
+        self.assertEqual(result[0][1], {"a": 1})
+        self.assertIsInstance(result[1][1], ValueError)
+        self.assertEqual(result[2][1], {"a": 2})
+
+    def test_ndjson_long_line(self):
+        body = b'{"a": 1}\n{"a": "' + b"x" * 100 + b'"}\n{"a": 2}\n'
+        result = list(iter_ndjson(BytesIO(body), max_line_size=50))
+        self.assertEqual(result[0], (1, {"a": 1}))
+        self.assertIsInstance(result[1][1], ValueError)
+        self.assertEqual(result[1][0], 2)
+        # The rest of the long line is skipped, not parsed as a line of its own
+        self.assertEqual(result[2], (3, {"a": 2}))
+        self.assertEqual(len(result), 3)
+
+    def test_json_array_chunk_boundaries(self):
+        for body in (dumps(self.rows), dumps(self.rows).replace(b",", b" ,\n "), "[]".encode()):
+            expected = list(enumerate(loads(body), 1))
+            for chunk_size in range(1, 16):
+                with self.subTest(body=body[:20], chunk_size=chunk_size):
+                    self.assertEqual(list(iter_json_array(BytesIO(body), chunk_size=chunk_size)), expected)
+
+    def test_json_array_invalid(self):
+        for body, position in (
+            (b'{"a": 1}', 1),
+            (b"[1, 2", 3),
+            (b"[1, 2 3]", 3),
+            (b'[{"a": 1}, {"a": tru}]', 2),
+            (b'[{"a": "\\uZZZZ"}]', 1),
+            (b'[{"a": "x]', 1),
+        ):
+            for chunk_size in (1, 4, 1024):
+                with self.subTest(body=body, chunk_size=chunk_size):
+                    result = list(iter_json_array(BytesIO(body), chunk_size=chunk_size))
+                    self.assertEqual(result[-1][0], position)
+                    self.assertIsInstance(result[-1][1], ValueError)
+
+    def test_json_array_syntax_error_stops_reading(self):
+        body = BytesIO(b'[{"a": 1x}, ' + b", ".join([b'{"a": 2}'] * 10000) + b"]")
+        result = list(iter_json_array(body, chunk_size=64))
+        self.assertEqual(len(result), 1)
+        self.assertIsInstance(result[0][1], ValueError)
+        # The error is reported from the first chunk, without buffering the rest of the upload
+        self.assertEqual(body.tell(), 64)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImportEventsTests(TestCase):
+    """
+    The bulk import of events.importer and its endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        auth_cache._local_users.clear()
+        self.promoter = _User.objects.create_user(email="promoter@example.com")
+
+    def import_rows(self, rows: list, batch_size: int = 2) -> list:
+        return list(bulk_create_events(enumerate(rows, 1), self.promoter, batch_size))
+
+    def test_batches(self):
+        # One INSERT per batch, inside the SAVEPOINT/RELEASE of atomic() under TestCase
+        with self.assertNumQueries(3 * 3):
+            results = self.import_rows([event_row(title=f"Event {n}") for n in range(5)])
+
+        self.assertEqual([result["line"] for result in results[:-1]], [1, 2, 3, 4, 5])
+        self.assertEqual(results[-1], {"success": True, "created": 5, "failed": 0})
+        uids = {str(uid) for uid in Event.objects.filter(promoter=self.promoter).values_list("uid", flat=True)}
+        self.assertEqual({str(result["data"]["uid"]) for result in results[:-1]}, uids)
+
+    def test_invalid_rows(self):
+        results = self.import_rows(
+            [event_row(), ValueError("Linha inválida"), event_row(start_at="2000-01-01T10:00:00"), {"title": "x"}]
+        )
+
+        errors = {result["line"]: result for result in results[:-1] if not result["success"]}
+        self.assertEqual(set(errors), {2, 3, 4})
+        self.assertEqual(errors[2]["error"][0]["type"], "json_error")
+        self.assertEqual(errors[4]["error"][0]["type"], "missing")
+        self.assertEqual(results[-1], {"success": False, "created": 1, "failed": 3})
+        self.assertEqual(Event.objects.filter(promoter=self.promoter).count(), 1)
+
+    def test_failing_batch_retried_one_by_one(self):
+        # Passes the schema but not the varchar(255) column, which fails the whole INSERT
+        results = self.import_rows([event_row(), event_row(title="x" * 300), event_row()], batch_size=3)
+
+        self.assertEqual(
+            [(result["line"], result["success"]) for result in results[:-1]], [(1, True), (2, False), (3, True)]
+        )
+        self.assertEqual(results[1]["error"][0]["type"], "database_error")
+        self.assertEqual(results[-1], {"success": False, "created": 2, "failed": 1})
+        self.assertEqual(Event.objects.filter(promoter=self.promoter).count(), 2)
+
+    def test_endpoint(self):
+        client = Client(headers={"authorization": f"Bearer {issue_token(self.promoter)}"})
+        ndjson = dumps(event_row(), option=OPT_APPEND_NEWLINE) + b"{oops\n" + dumps(event_row())
+        for body, content_type in ((ndjson, "application/x-ndjson"), (dumps([event_row(), {}]), "application/json")):
+            with self.subTest(content_type=content_type):
+                response = client.post("/api/v1/events/import/", body, content_type=content_type)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], "application/x-ndjson")
+                results = [loads(line) for line in b"".join(response.streaming_content).splitlines()]
+                self.assertEqual(results[-1]["failed"], 1)
+                self.assertEqual(results[-1]["created"], 2 if content_type == "application/x-ndjson" else 1)
+
+    def test_endpoint_requires_authentication(self):
+        response = Client().post("/api/v1/events/import/", b"", content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, EXPORT_CHUNK_SIZE=2)
+class AttendeeExportTests(TestCase):
+    """
+    The attendee export task and its endpoints, which only serve the promoter who
+    requested the export.
+    """
+
+    def setUp(self):
+        cache.clear()
+        auth_cache._local_users.clear()
+        self.media_root = self.enterContext(TemporaryDirectory())
+        self.enterContext(self.settings(MEDIA_ROOT=self.media_root))
+        self.promoter = _User.objects.create_user(email="promoter@example.com")
+        self.event = create_event(self.promoter)
+        self.client = Client(headers={"authorization": f"Bearer {issue_token(self.promoter)}"})
+        self.exports_url = f"/api/v1/events/{self.event.uid}/exports"
+
+    def test_export_attendees(self):
+        users = create_users("attendee", 5)
+        Subscription.objects.bulk_create([Subscription(user=user, event=self.event) for user in users])
+        export = AttendeeExport.objects.create(event=self.event, requested_by=self.promoter)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = export_attendees(export.id)
+
+        export.refresh_from_db()
+        self.assertEqual(result, {"exported_rows": 5, "file": f"exports/{export.uid}.csv.gz"})
+        self.assertEqual(export.status, TypeExportStatus.DONE)
+        self.assertEqual(export.model_dump()["progress"], 1)
+        # RUNNING, the progress after each chunk of 2 rows, then DONE
+        updates = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "events_attendeeexport"')]
+        self.assertEqual(len(updates), 4)
+
+        with export.file.open("rb") as file:
+            rows = list(csv.reader(decompress(file.read()).decode().splitlines()))
+        self.assertEqual(tuple(rows[0]), ATTENDEE_EXPORT_HEADER)
+        self.assertEqual({row[0] for row in rows[1:]}, {user.email for user in users})
+        created = TRANSLATED_SUBSCRIPTION_STATUS[TypeSubscriptionStatus.CREATED]
+        self.assertEqual({row[2] for row in rows[1:]}, {created})
+
+    def test_export_attendees_failure(self):
+        Subscription.objects.create(user=create_users("attendee", 1)[0], event=self.event)
+        export = AttendeeExport.objects.create(event=self.event, requested_by=self.promoter)
+
+        with mock.patch("events.tasks.export.os.replace", side_effect=OSError("Disco cheio")):
+            with self.assertRaises(OSError):
+                export_attendees(export.id)
+
+        export.refresh_from_db()
+        self.assertEqual(export.status, TypeExportStatus.FAILED)
+        self.assertEqual(export.error, "Disco cheio")
+        self.assertFalse(export.file)
+        self.assertEqual(list((Path(self.media_root) / "exports").iterdir()), [])
+
+    def test_export_attendees_given_up(self):
+        export = AttendeeExport.objects.create(
+            event=self.event, requested_by=self.promoter, status=TypeExportStatus.FAILED
+        )
+        self.assertEqual(export_attendees(export.id), {"exported_rows": 0, "file": None})
+        export.refresh_from_db()
+        self.assertEqual(export.status, TypeExportStatus.FAILED)
+
+    def test_create_returns_the_active_export(self):
+        first = self.client.post(f"{self.exports_url}/create/").json()["data"]
+        second = self.client.post(f"{self.exports_url}/create/").json()["data"]
+        self.assertEqual(first["uid"], second["uid"])
+
+        with self.assertRaises(IntegrityError):
+            AttendeeExport.objects.create(event=self.event, requested_by=self.promoter)
+
+    def test_create_replaces_a_stale_export(self):
+        stale = AttendeeExport.objects.create(
+            event=self.event, requested_by=self.promoter, status=TypeExportStatus.RUNNING
+        )
+        AttendeeExport.objects.filter(id=stale.id).update(updated_at=Now() - timedelta(hours=1))
+
+        data = self.client.post(f"{self.exports_url}/create/").json()["data"]
+
+        self.assertNotEqual(data["uid"], str(stale.uid))
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, TypeExportStatus.FAILED)
+        self.assertTrue(stale.error)
+
+    def test_endpoints_only_serve_the_requester(self):
+        export = AttendeeExport.objects.create(event=self.event, requested_by=self.promoter)
+        export.status = TypeExportStatus.DONE
+        export.file.save("attendees.csv.gz", ContentFile(compress(b"email\n")))
+        other = _User.objects.create_user(email="other@example.com")
+        other_client = Client(headers={"authorization": f"Bearer {issue_token(other)}"})
+
+        for action in ("detail", "download"):
+            url = f"{self.exports_url}/{export.uid}/{action}/"
+            with self.subTest(action=action):
+                self.assertEqual(self.client.get(url).status_code, 200)
+                response = other_client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["error"][0]["type"], "not_found")
+
+        # Nor can another promoter request an export of the event
+        response = other_client.post(f"{self.exports_url}/create/")
+        self.assertEqual(response.json()["error"][0]["loc"], "event_uid")
+
+    def test_download_not_ready(self):
+        export = AttendeeExport.objects.create(event=self.event, requested_by=self.promoter)
+        response = self.client.get(f"{self.exports_url}/{export.uid}/download/")
+        self.assertEqual(response.json()["error"][0]["type"], "not_ready")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AttendeeExportRaceTests(TransactionTestCase):
+    """
+    Concurrent requests for an export of the same event, each in its own thread and
+    database connection, get a single export.
+    """
+
+    requests = 4
+
+    def test_concurrent_requests_share_the_export(self):
+        promoter = _User.objects.create_user(email="promoter@example.com")
+        event = create_event(promoter)
+        token = issue_token(promoter)
+        barrier = Barrier(self.requests)
+
+        def request(_) -> str:
+            try:
+                client = Client(headers={"authorization": f"Bearer {token}"})
+                barrier.wait()
+                return client.post(f"/api/v1/events/{event.uid}/exports/create/").json()["data"]["uid"]
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.requests) as executor:
+            uids = set(executor.map(request, range(self.requests)))
+
+        self.assertEqual(len(uids), 1)
+        self.assertEqual(AttendeeExport.objects.filter(event=event).count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PromoterEmailInvalidationTests(TestCase):
+    """
+    The event detail embeds the promoter email, its cache is dropped when the email changes,
+    only once the change is committed.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.promoter = _User.objects.create_user(email="promoter@example.com")
+        self.event = create_event(self.promoter)
+
+    def test_email_change_drops_the_detail_on_commit(self):
+        self.assertIn(b"promoter@example.com", event_cache.get_detail(self.event.uid)[0])
+        list_generation = event_cache.list_generation()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.promoter.email = "renamed@example.com"
+            self.promoter.save()
+            # Still the committed email until then, a reader caching it now would be dropped too
+            self.assertIn(b"promoter@example.com", event_cache.get_detail(self.event.uid)[0])
+
+        self.assertIn(b"renamed@example.com", event_cache.get_detail(self.event.uid)[0])
+        self.assertNotEqual(event_cache.list_generation(), list_generation)
+
+    def test_other_changes_keep_the_detail(self):
+        event_cache.get_detail(self.event.uid)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.promoter.first_name = "Promoter"
+            self.promoter.save()
+        self.assertEqual(callbacks, [])
@@ -1,17 +1,33 @@
+from django.conf import settings
 from django.urls import path, include
 
 
 from events.views.event import (
     create_event,
+    import_events,
+    aimport_events,
     list_events,
+    alist_events,
     detail_event,
+    adetail_event,
     update_event,
     delete_event,
 )
+from events.views.export import (
+    create_attendee_export,
+    detail_attendee_export,
+    download_attendee_export,
+    adownload_attendee_export,
+)
+
+if settings.API_ASYNC_VIEWS:
+    list_events, detail_event = alist_events, adetail_event
+    import_events, download_attendee_export = aimport_events, adownload_attendee_export
 
 
 urlpatterns = [
     path("create/", create_event, name="create-event"),
+    path("import/", import_events, name="import-event"),
     path("list/", list_events, name="list-event"),
     path(
         "<uuid:event_uid>/",
@@ -20,6 +36,16 @@ urlpatterns = [
                 path("detail/", detail_event, name="detail-event"),
                 path("update/", update_event, name="update-event"),
                 path("delete/", delete_event, name="delete-event"),
+                path("exports/create/", create_attendee_export, name="create-attendee-export"),
+                path(
+                    "exports/<uuid:export_uid>/",
+                    include(
+                        [
+                            path("detail/", detail_attendee_export, name="detail-attendee-export"),
+                            path("download/", download_attendee_export, name="download-attendee-export"),
+                        ]
+                    ),
+                ),
             ]
         ),
     ),
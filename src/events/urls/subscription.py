@@ -1,13 +1,19 @@
+from django.conf import settings
 from django.urls import path, include
 
 
 from events.views.subscription import (
     create_subscription,
     list_subscription,
+    alist_subscription,
     detail_subscription,
+    adetail_subscription,
     unsigned_subscription,
 )
 
+if settings.API_ASYNC_VIEWS:
+    list_subscription, detail_subscription = alist_subscription, adetail_subscription
+
 
 urlpatterns = [
     path("create/", create_subscription, name="create-subscription"),
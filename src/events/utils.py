@@ -1,3 +1,23 @@
+from typing import Optional, Tuple
+
+from events.constants import TRANSLATED_SUBSCRIPTION_STATUS
+from utils.serializers import Shape
+
+
+def translate_subscription_status(status: Optional[int]) -> str:
+    """
+    Translates a TypeSubscriptionStatus, "Desconhecido" for an unknown one as the SQL
+    CASE of the list endpoints does.
+
+    Args:
+        status (Optional[int]): The current_status of a subscription.
+
+    Returns:
+        str: The translated status.
+    """
+    return TRANSLATED_SUBSCRIPTION_STATUS.get(status, "Desconhecido")
+
+
 FIELDS_BY_EVENT_MODEL_DUMP = (
     "uid",
     "promoter__email",
@@ -6,6 +26,13 @@ FIELDS_BY_EVENT_MODEL_DUMP = (
     "address",
     "start_at",
     "is_active",
+    "capacity",
+    "seats_taken",
+    "subscription_counts__created",
+    "subscription_counts__confirmed",
+    "subscription_counts__canceled",
+    "subscription_counts__unsigned",
+    "subscription_counts__waitlisted",
     "created_at",
     "updated_at",
 )
@@ -21,6 +48,53 @@ FIELDS_BY_SUBSCRIPTION_MODEL_DUMP = (
     "updated_at",
 )
 
+# Output of the event and subscription detail/create/update endpoints, see Event.model_dump and Subscription.model_dump
+EVENT_SHAPE = Shape(
+    uid="uid",
+    promoter="promoter__email",
+    title="title",
+    description="description",
+    address="address",
+    start_at="start_at",
+    is_active="is_active",
+    capacity="capacity",
+    seats_taken="seats_taken",
+    # Kept by triggers in events_eventsubscriptioncounts, a one-to-one join instead of an aggregate
+    subscriptions_created="subscription_counts__created",
+    subscriptions_confirmed="subscription_counts__confirmed",
+    subscriptions_canceled="subscription_counts__canceled",
+    subscriptions_unsigned="subscription_counts__unsigned",
+    subscriptions_waitlisted="subscription_counts__waitlisted",
+    created_at="created_at",
+    updated_at="updated_at",
+)
+
+SUBSCRIPTION_SHAPE = Shape(
+    uid="uid",
+    event__title="event__title",
+    event__description="event__description",
+    event__start_at="event__start_at",
+    event__is_active="event__is_active",
+    created_at="created_at",
+    updated_at="updated_at",
+    status=("current_status", translate_subscription_status),
+)
+
+# Fields a client may request with `fields=`, the order of the tuples is the order of the response
+FIELDS_BY_SUBSCRIPTION_LIST = FIELDS_BY_SUBSCRIPTION_MODEL_DUMP + ("status",)
+
+FIELDS_BY_DASHBOARD_EVENT = (
+    "uid",
+    "title",
+    "description",
+    "address",
+    "start_at",
+    "is_active",
+    "created_at",
+    "updated_at",
+    "list_subscriptions",
+    "total_subscriptions",
+)
 
 FIELDS_SUBSCRIPTION_BY_DASHBOARD_DUMP = (
     "uid",
@@ -29,3 +103,35 @@ FIELDS_SUBSCRIPTION_BY_DASHBOARD_DUMP = (
     # "updated_at",
     "status",
 )
+
+
+def parse_fields(fields: Optional[str], allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Validates a `fields=` query parameter against a whitelist.
+
+    Args:
+        fields (Optional[str]): Comma separated field names, None or empty selects every allowed field.
+        allowed (Tuple[str, ...]): The fields that can be requested.
+
+    Returns:
+        Tuple[str, ...]: The requested fields, in the order of ``allowed``.
+
+    Raises:
+        ValueError: If a requested field is not allowed.
+
+    Example:
+        >>> parse_fields("title,uid", FIELDS_BY_EVENT_MODEL_DUMP)
+        ('uid', 'title')
+    """
+    if not fields:
+        return allowed
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"Campos inválidos: {', '.join(sorted(unknown))}")
+
+    if not requested:
+        return allowed
+
+    return tuple(field for field in allowed if field in requested)
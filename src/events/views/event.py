@@ -1,18 +1,74 @@
+from functools import partial
 from uuid import UUID
 from django.http import HttpRequest
 from orjson import loads, JSONDecodeError
 from pydantic import ValidationError
 from typing import Union
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F, QuerySet
+from django.conf import settings
+from django.db import IntegrityError, transaction
 
-from utils.response import JsonResponseBadRequest, JsonResponse
-from utils.pagination import generate_pagination_by_models
+from utils.response import JsonResponseBadRequest, JsonResponse, RawJsonResponse, NDJsonStreamingResponse
+from utils.streaming import iter_json_array, iter_ndjson
+from utils.pagination import generate_pagination_by_models, generate_pagination_by_cursor
+from utils.conditional import conditional_view
 
 from events.schemas.event import EventCreate, EventUpdate
-from events.models import Event
+from events.models import Event, EventSubscriptionCounts
 from events.filters import EventParams
+from events import cache as event_cache
+from events.importer import abulk_create_events, bulk_create_events
+from events.utils import EVENT_SHAPE
+from events.subscriptions import schedule_promotion
 
 from accounts.decorators import check_session_view
-from events.utils import FIELDS_BY_EVENT_MODEL_DUMP
+
+
+def _list_events_validators(request: HttpRequest):
+    try:
+        event_params = EventParams(**request.GET.dict())
+    except ValidationError:
+        return None
+
+    # Without Redis there is no generation and no ETag: an aggregate of the rows would not
+    # see the seat and subscription counters, which change without touching updated_at
+    etag = event_cache.list_etag(event_params)
+    return (etag, None) if etag is not None else None
+
+
+def _detail_event_validators(request: HttpRequest, event_uid: UUID):
+    # Kept for the view, which then needs no second cache read (nor thread hop under ASGI)
+    detail = request.event_detail = event_cache.get_detail(event_uid)
+    if detail is None:
+        return None
+
+    # No Last-Modified: seats_taken and the subscription counts change without touching updated_at
+    return detail[1], None
+
+
+def _events_queryset(event_params: EventParams) -> QuerySet:
+    events = Event.objects.filter(event_params.params)
+    if event_params.search_query is not None:
+        events = events.annotate(rank=SearchRank(F("search_vector"), event_params.search_query))
+
+    return events.order_by(event_params.order_by).values(
+        *event_params.projection,
+    )
+
+
+def _paginate_events(events: QuerySet, event_params: EventParams) -> dict:
+    if event_params.pagination == "cursor":
+        return generate_pagination_by_cursor(events, event_params.order_by, event_params.cursor, event_params.limit)
+
+    return generate_pagination_by_models(events, event_params.page, event_params.limit, event_params.count)
+
+
+def _import_rows(request: HttpRequest):
+    if request.content_type == "application/json":
+        return iter_json_array(request)
+    return iter_ndjson(request)
 
 
 @check_session_view("POST")
@@ -35,10 +91,13 @@ def create_event(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadReq
             "title": "My Event",
             "description": "This is a test event",
             "start_at": "2022-01-01T12:00:00",
-            "address": "123 Main St"
+            "address": "123 Main St",
+            "capacity": 100
         }
         ```
 
+        `capacity` is optional, an event without it takes any number of subscribers.
+
         Response:
         ```
         {
@@ -50,7 +109,9 @@ def create_event(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadReq
                 "description": "This is a test event",
                 "address": "123 Main St",
                 "start_at": "2022-01-01T12:00:00",
-                "is_active": true
+                "is_active": true,
+                "capacity": 100,
+                "seats_taken": 0
             }
         }
         ```
@@ -82,8 +143,11 @@ def create_event(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadReq
         description=payload.description,
         start_at=payload.start_at,
         address=payload.address,
+        capacity=payload.capacity,
         promoter=request.user,
     )
+    # The insert trigger created its counts row, all zeros: model_dump needs no query to read it
+    event.subscription_counts = EventSubscriptionCounts(event=event)
 
     return JsonResponse(
         content={
@@ -93,13 +157,69 @@ def create_event(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadReq
     )
 
 
+@check_session_view("POST")
+def import_events(request: HttpRequest) -> NDJsonStreamingResponse:
+    """
+    Create many events of the authenticated promoter from a single upload.
+
+    The body is an NDJSON stream of EventCreate payloads, one per line, or a JSON array
+    of them when sent as `application/json`. Rows are read, validated and inserted while
+    the body arrives (see events.importer), so memory use does not grow with the upload.
+
+    Args:
+        request (HttpRequest): The HTTP request object, its body is read as a stream.
+
+    Returns:
+        NDJsonStreamingResponse: One result per row, identified by its line (or position in
+        the array), followed by a summary line. Invalid rows do not stop the import.
+
+    Example:
+        Request:
+        ```
+        POST /events/import/
+        Content-Type: application/x-ndjson
+
+        {"title": "My Event", "description": "...", "start_at": "2030-01-01T12:00:00", "address": "123 Main St"}
+        {"title": "", "description": "..."}
+        ```
+
+        Response:
+        ```
+        {"line": 2, "success": false, "error": [{"loc": ["start_at"], "msg": "Field required", "type": "missing"}]}
+        {"line": 1, "success": true, "data": {"uid": "123e4567-e89b-12d3-a456-426614174000"}}
+        {"success": false, "created": 1, "failed": 1}
+        ```
+    """
+    return NDJsonStreamingResponse(
+        bulk_create_events(_import_rows(request), request.user, settings.EVENT_IMPORT_BATCH_SIZE)
+    )
+
+
+@check_session_view("POST")
+async def aimport_events(request: HttpRequest) -> NDJsonStreamingResponse:
+    """
+    Async version of import_events, served by core.asgi. A sync iterator would be
+    consumed whole by the ASGI handler before the first byte is sent, the import runs
+    instead in one worker thread hop per batch (see events.importer.abulk_create_events).
+    """
+    return NDJsonStreamingResponse(
+        abulk_create_events(_import_rows(request), request.user, settings.EVENT_IMPORT_BATCH_SIZE)
+    )
+
+
 @check_session_view("GET")
-def list_events(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequest]:
+@conditional_view(_list_events_validators)
+def list_events(request: HttpRequest) -> Union[RawJsonResponse, JsonResponseBadRequest]:
     """
     List all events.
 
     This view function handles GET requests to list all events.
 
+    Pages are cached in Redis under the generation of the event lists, bumped by every
+    event write (see events.cache.get_list_page). The ETag is derived from that generation
+    and the normalized params, a matching If-None-Match is answered with a 304 without
+    touching the database.
+
     Args:
         request (HttpRequest): The HTTP request object.
 
@@ -121,6 +241,9 @@ def list_events(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequ
         }
         ```
 
+        `search` is a full-text search (portuguese stemming, accent insensitive) over title,
+        address and description. `order_by=relevance` sorts the best matches first.
+
         Response:
         ```
         {
@@ -129,6 +252,7 @@ def list_events(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequ
             "next_page": null,
             "num_pages": 1,
             "total": 10,
+            "count_strategy": "exact",
             "data": [
                 {
                     "uid": "123e4567-e89b-12d3-a456-426614174000",
@@ -143,6 +267,41 @@ def list_events(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequ
         }
         ```
 
+        With `pagination=cursor` (or a `cursor` param) the page is located by keyset
+        instead of page number, and the response carries opaque cursors instead of
+        page numbers and totals:
+        ```
+        GET /events/list/?pagination=cursor&limit=10
+        GET /events/list/?cursor=eyJvcmRlcl9ieSI6InN0YXJ0X2F0Ii...&limit=10
+        {
+            "success": true,
+            "previous_cursor": null,
+            "next_cursor": "eyJvcmRlcl9ieSI6InN0YXJ0X2F0Ii...",
+            "data": [...]
+        }
+        ```
+
+        `fields=` keeps only the listed keys of each event (any of FIELDS_BY_EVENT_MODEL_DUMP),
+        the other columns are not even selected and `promoter__email` is the only one that
+        joins the promoter:
+        ```
+        GET /events/list/?fields=uid,title,start_at
+        {
+            "success": true,
+            ...
+            "data": [{"uid": "123e4567-...", "title": "My Event", "start_at": "2022-01-01T12:00:00"}]
+        }
+        ```
+
+        With `format=ndjson` every matching event is streamed, one per line, read from
+        the database with a server-side cursor in chunks of EXPORT_CHUNK_SIZE rows.
+        `limit`, `page` and `cursor` are ignored:
+        ```
+        GET /events/list/?format=ndjson&search=forró
+        {"uid": "123e4567-e89b-12d3-a456-426614174000", "promoter__email": "aa@aa.com", ...}
+        {"uid": "...", ...}
+        ```
+
     """
     try:
         event_params = EventParams(**request.GET.dict())
@@ -162,30 +321,75 @@ def list_events(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequ
             }
         )
 
-    events = (
-        Event.objects.filter(event_params.params)
-        .order_by(event_params.order_by)
-        .values(
-            *FIELDS_BY_EVENT_MODEL_DUMP,
+    events = _events_queryset(event_params)
+
+    if event_params.format == "ndjson":
+        # Bind the database now, the rows are read once the view (and the replica routing) returned
+        events = events.using(events.db)
+        return NDJsonStreamingResponse(events.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+
+    return RawJsonResponse(event_cache.get_list_page(event_params, partial(_paginate_events, events, event_params)))
+
+
+@check_session_view("GET")
+@conditional_view(_list_events_validators)
+async def alist_events(request: HttpRequest) -> Union[RawJsonResponse, JsonResponseBadRequest]:
+    """
+    Async version of list_events, served by core.asgi.
+
+    The exports stream from the async ORM, a page is read (from the cache or the
+    database) in a single worker thread hop because the pagination helpers run several
+    queries.
+    """
+    try:
+        event_params = EventParams(**request.GET.dict())
+    except ValidationError as e:
+        error = [
+            {
+                "loc": x["loc"],
+                "msg": x["msg"],
+                "type": x["type"],
+            }
+            for x in e.errors()
+        ]
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": error,
+            }
         )
-    )
 
-    data = generate_pagination_by_models(events, event_params.page, event_params.limit)
+    events = _events_queryset(event_params)
+
+    if event_params.format == "ndjson":
+        # Bind the database now, the rows are read once the view (and the replica routing) returned
+        events = events.using(events.db)
+        return NDJsonStreamingResponse(events.aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
 
-    return JsonResponse(content=data)
+    page = await sync_to_async(event_cache.get_list_page)(
+        event_params,
+        partial(_paginate_events, events, event_params),
+    )
+    return RawJsonResponse(page)
 
 
 @check_session_view("GET")
-def detail_event(request: HttpRequest, event_uid: UUID) -> Union[JsonResponse, JsonResponseBadRequest]:
+@conditional_view(_detail_event_validators)
+def detail_event(request: HttpRequest, event_uid: UUID) -> Union[RawJsonResponse, JsonResponseBadRequest]:
     """
     Retrieve event details based on the provided event UID.
 
+    The serialized response is cached in Redis by uid (see ``events.cache``), it is
+    dropped when the event is updated or deleted, when the promoter email changes and
+    when a subscription takes or gives back a seat. The ETag comes from the same cache
+    entry, so a 304 costs no query at all.
+
     Args:
         request (HttpRequest): The HTTP request object.
         event_uid (UUID): The unique identifier of the event to retrieve.
 
     Returns:
-        Union[JsonResponse, JsonResponseBadRequest]: A JSON response containing the event details if found,
+        Union[RawJsonResponse, JsonResponseBadRequest]: A JSON response containing the event details if found,
         otherwise a JSON response indicating that the event was not found.
 
     Example:
@@ -210,9 +414,8 @@ def detail_event(request: HttpRequest, event_uid: UUID) -> Union[JsonResponse, J
         }
         ```
     """
-    try:
-        event = Event.objects.get(uid=event_uid)
-    except Event.DoesNotExist:
+    detail = request.event_detail
+    if detail is None:
         return JsonResponseBadRequest(
             content={
                 "success": False,
@@ -226,12 +429,32 @@ def detail_event(request: HttpRequest, event_uid: UUID) -> Union[JsonResponse, J
             }
         )
 
-    return JsonResponse(
-        content={
-            "success": True,
-            "data": event.model_dump(),
-        }
-    )
+    return RawJsonResponse(detail[0])
+
+
+@check_session_view("GET")
+@conditional_view(_detail_event_validators)
+async def adetail_event(request: HttpRequest, event_uid: UUID) -> Union[RawJsonResponse, JsonResponseBadRequest]:
+    """
+    Async version of detail_event, served by core.asgi. The detail was read along with
+    the validators, in the single worker thread hop of conditional_view.
+    """
+    detail = request.event_detail
+    if detail is None:
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": [
+                    {
+                        "loc": "event_uid",
+                        "msg": "Evento não encontrado",
+                        "type": "not_found",
+                    }
+                ],
+            }
+        )
+
+    return RawJsonResponse(detail[0])
 
 
 @check_session_view("PUT")
@@ -283,7 +506,7 @@ def update_event(request: HttpRequest, event_uid: UUID) -> Union[JsonResponse, J
         ```
     """
     try:
-        event = Event.objects.get(uid=event_uid, promoter=request.user)
+        event = Event.objects.select_related(*EVENT_SHAPE.related).get(uid=event_uid, promoter=request.user)
     except Event.DoesNotExist:
         return JsonResponseBadRequest(
             content={
@@ -324,7 +547,28 @@ def update_event(request: HttpRequest, event_uid: UUID) -> Union[JsonResponse, J
         if value is not None:
             setattr(event, key, value)
 
-    event.save()
+    try:
+        with transaction.atomic():
+            event.save()
+    except IntegrityError:
+        # event_seats_within_capacity: the new capacity is below the seats already taken
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": [
+                    {
+                        "loc": "capacity",
+                        "msg": "Capacidade menor que o número de inscritos",
+                        "type": "below_seats_taken",
+                    }
+                ],
+            }
+        )
+
+    event_cache.delete_detail(event.uid)
+    if payload.capacity is not None:
+        # A larger capacity frees seats for the waitlist
+        schedule_promotion(event.id)
 
     return JsonResponse(
         content={
@@ -378,6 +622,7 @@ def delete_event(request: HttpRequest, event_uid: UUID) -> Union[JsonResponse, J
         )
 
     event.delete()
+    event_cache.delete_detail(event_uid)
 
     return JsonResponse(
         content={
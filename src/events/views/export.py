@@ -0,0 +1,242 @@
+from datetime import timedelta
+from uuid import UUID
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Now
+from django.http import FileResponse, HttpRequest, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from typing import Tuple, Union
+
+from utils.response import JsonResponseBadRequest, JsonResponse
+from utils.streaming import aiter_file
+from utils.tasks import create_periodic_task
+
+from events.models import AttendeeExport, Event
+from events.constants import TypeExportStatus
+from accounts.decorators import check_session_view
+
+
+def _export_not_found() -> JsonResponseBadRequest:
+    return JsonResponseBadRequest(
+        content={
+            "success": False,
+            "error": [
+                {
+                    "loc": "export_uid",
+                    "msg": "Exportação não encontrada",
+                    "type": "not_found",
+                }
+            ],
+        }
+    )
+
+
+def _finished_export(
+    request: HttpRequest, event_uid: UUID, export_uid: UUID
+) -> Union[AttendeeExport, JsonResponseBadRequest]:
+    try:
+        export = AttendeeExport.objects.get(
+            uid=export_uid,
+            event__uid=event_uid,
+            requested_by=request.user,
+        )
+    except AttendeeExport.DoesNotExist:
+        return _export_not_found()
+
+    if export.status != TypeExportStatus.DONE or not export.file:
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": [
+                    {
+                        "loc": "export_uid",
+                        "msg": "Exportação ainda não concluída",
+                        "type": "not_ready",
+                    }
+                ],
+            }
+        )
+
+    return export
+
+
+def _open_export(export: AttendeeExport) -> Tuple[File, int]:
+    file = export.file.open("rb")
+    return file, file.size
+
+
+@check_session_view("POST")
+def create_attendee_export(request: HttpRequest, event_uid: UUID) -> Union[JsonResponse, JsonResponseBadRequest]:
+    """
+    Request the export of the attendee list of an event of the authenticated promoter.
+
+    The CSV is built in the background by events.tasks.export.export_attendees, poll
+    detail_attendee_export until it is done. While an export of the event is pending or
+    running, the same export is returned instead of a new one. An export not updated for
+    longer than EXPORT_TIME_LIMIT is marked as failed, and a new one is requested.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing user information.
+        event_uid (UUID): The unique identifier of the event.
+
+    Returns:
+        Union[JsonResponse, JsonResponseBadRequest]: A JSON response with the export and its progress,
+        or a JSON response indicating that the event was not found.
+
+    Example:
+        Request:
+        ```
+        POST /events/123e4567-e89b-12d3-a456-426614174000/exports/create/
+        ```
+
+        Response:
+        ```
+        {
+            "success": true,
+            "data": {
+                "uid": "5f0c3a5e-7f8e-4a43-9d1e-2b7c6f0a1d11",
+                "event": "123e4567-e89b-12d3-a456-426614174000",
+                "status": "Pendente",
+                "total_rows": 0,
+                "exported_rows": 0,
+                "progress": 0,
+                "error": null,
+                "created_at": "2022-01-01T12:00:00",
+                "updated_at": "2022-01-01T12:00:00"
+            }
+        }
+        ```
+    """
+    try:
+        event = Event.objects.get(uid=event_uid, promoter=request.user)
+    except Event.DoesNotExist:
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": [
+                    {
+                        "loc": "event_uid",
+                        "msg": "Evento não encontrado",
+                        "type": "not_found",
+                    }
+                ],
+            }
+        )
+
+    active = AttendeeExport.objects.filter(
+        event=event,
+        requested_by=request.user,
+        status__in=[TypeExportStatus.PENDING, TypeExportStatus.RUNNING],
+    )
+    # The task saves updated_at after every chunk, an export silent for longer than its time
+    # limit was killed (or its worker died) and would otherwise be returned forever
+    active.filter(updated_at__lt=Now() - timedelta(seconds=settings.EXPORT_TIME_LIMIT)).update(
+        status=TypeExportStatus.FAILED,
+        error="Exportação interrompida, solicite novamente",
+        updated_at=Now(),
+    )
+
+    export = active.first()
+    if export is None:
+        try:
+            with transaction.atomic():
+                export = AttendeeExport.objects.create(event=event, requested_by=request.user)
+                create_periodic_task(
+                    name=f"Export attendees of event {event.id} ({export.uid})",
+                    task="events.tasks.export.export_attendees",
+                    args=[export.id],
+                )
+        except IntegrityError:
+            # A concurrent request created it first, see the attendee_export_active_unique constraint
+            export = active.get()
+
+    return JsonResponse(
+        content={
+            "success": True,
+            "data": export.model_dump(),
+        }
+    )
+
+
+@check_session_view("GET")
+def detail_attendee_export(
+    request: HttpRequest, event_uid: UUID, export_uid: UUID
+) -> Union[JsonResponse, JsonResponseBadRequest]:
+    """
+    Retrieve the progress of an attendee export requested by the authenticated user.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing user information.
+        event_uid (UUID): The unique identifier of the event.
+        export_uid (UUID): The unique identifier of the export.
+
+    Returns:
+        Union[JsonResponse, JsonResponseBadRequest]: A JSON response with the export, see
+        create_attendee_export, or a JSON response indicating that the export was not found.
+        Once the status is "Concluído" the file is served by download_attendee_export.
+    """
+    try:
+        export = AttendeeExport.objects.select_related("event").get(
+            uid=export_uid,
+            event__uid=event_uid,
+            requested_by=request.user,
+        )
+    except AttendeeExport.DoesNotExist:
+        return _export_not_found()
+
+    return JsonResponse(
+        content={
+            "success": True,
+            "data": export.model_dump(),
+        }
+    )
+
+
+@check_session_view("GET")
+def download_attendee_export(
+    request: HttpRequest, event_uid: UUID, export_uid: UUID
+) -> Union[FileResponse, JsonResponseBadRequest]:
+    """
+    Download the gzipped CSV of a finished attendee export requested by the authenticated user.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing user information.
+        event_uid (UUID): The unique identifier of the event.
+        export_uid (UUID): The unique identifier of the export.
+
+    Returns:
+        Union[FileResponse, JsonResponseBadRequest]: The file streamed from MEDIA_ROOT, or a JSON
+        response indicating that the export was not found or is not done yet.
+    """
+    export = _finished_export(request, event_uid, export_uid)
+    if isinstance(export, JsonResponseBadRequest):
+        return export
+
+    return FileResponse(
+        export.file.open("rb"),
+        as_attachment=True,
+        filename=f"attendees-{event_uid}.csv.gz",
+        content_type="application/gzip",
+    )
+
+
+@check_session_view("GET")
+async def adownload_attendee_export(
+    request: HttpRequest, event_uid: UUID, export_uid: UUID
+) -> Union[StreamingHttpResponse, JsonResponseBadRequest]:
+    """
+    Async version of download_attendee_export, served by core.asgi. The ASGI handler
+    would read the file of a FileResponse whole into memory before sending it, it is read
+    in chunks from a worker thread instead (see utils.streaming.aiter_file).
+    """
+    export = await sync_to_async(_finished_export)(request, event_uid, export_uid)
+    if isinstance(export, JsonResponseBadRequest):
+        return export
+
+    file, size = await sync_to_async(_open_export, thread_sensitive=False)(export)
+    response = StreamingHttpResponse(aiter_file(file), content_type="application/gzip")
+    response["Content-Length"] = size
+    response["Content-Disposition"] = content_disposition_header(True, f"attendees-{event_uid}.csv.gz")
+    return response
@@ -3,17 +3,88 @@ from django.http import HttpRequest
 from orjson import loads, JSONDecodeError
 from pydantic import ValidationError
 from typing import Union
-from django.db.models import OuterRef, Subquery, Case, When, Value, CharField
+from django.db.models import Case, When, Value, CharField, F, QuerySet
+from django.contrib.postgres.search import SearchRank
+from django.conf import settings
+from asgiref.sync import sync_to_async
 
-from utils.response import JsonResponseBadRequest, JsonResponse
-from utils.pagination import generate_pagination_by_models
+from utils.response import JsonResponseBadRequest, JsonResponse, NDJsonStreamingResponse
+from utils.pagination import generate_pagination_by_models, generate_pagination_by_cursor
+from utils.conditional import conditional_view, make_etag
 
+from events import cache as event_cache
 from events.schemas.subscription import SubscriptionCreate
-from events.models import Subscription, SubscriptionStatus, Event
+from events.models import Subscription
 from events.filters import SubscriptionParams
-from events.constants import TypeSubscriptionStatus
+from events.constants import TRANSLATED_SUBSCRIPTION_STATUS, TypeSubscriptionStatus
 from accounts.decorators import check_session_view
-from events.utils import FIELDS_BY_SUBSCRIPTION_MODEL_DUMP
+from events.utils import SUBSCRIPTION_SHAPE
+from events.subscriptions import subscribe, unsubscribe
+
+
+def _list_subscription_validators(request: HttpRequest):
+    try:
+        subscription_params = SubscriptionParams(**request.GET.dict())
+    except ValidationError:
+        return None
+
+    # A single Redis read, no aggregate over the subscriptions
+    etag = event_cache.subscription_list_etag(subscription_params, request.GET.items())
+    return (etag, None) if etag is not None else None
+
+
+def _detail_subscription_validators(request: HttpRequest, subscription_uid: UUID):
+    versions = (
+        Subscription.objects.filter(uid=subscription_uid, user=request.user)
+        .values_list("updated_at", "event__updated_at")
+        .first()
+    )
+    if versions is None:
+        return None
+
+    return make_etag(subscription_uid, *versions), max(versions)
+
+
+def _subscriptions_queryset(subscription_params: SubscriptionParams) -> QuerySet:
+    subscriptions = Subscription.objects.all()
+    if subscription_params.search_query is not None:
+        subscriptions = subscriptions.annotate(
+            rank=SearchRank(F("event__search_vector"), subscription_params.search_query),
+        )
+
+    subscriptions = subscriptions.filter(subscription_params.params).values(
+        *[field for field in subscription_params.projection if field != "status"]
+    )
+    if "status" in subscription_params.projection:
+        subscriptions = subscriptions.annotate(
+            status=Case(
+                *[
+                    When(current_status=status, then=Value(translated))
+                    for status, translated in TRANSLATED_SUBSCRIPTION_STATUS.items()
+                ],
+                default=Value("Desconhecido"),
+                output_field=CharField(),
+            ),
+        )
+
+    return subscriptions.order_by(subscription_params.order_by)
+
+
+def _paginate_subscriptions(subscriptions: QuerySet, subscription_params: SubscriptionParams) -> dict:
+    if subscription_params.pagination == "cursor":
+        return generate_pagination_by_cursor(
+            subscriptions,
+            subscription_params.order_by,
+            subscription_params.cursor,
+            subscription_params.limit,
+        )
+
+    return generate_pagination_by_models(
+        subscriptions,
+        subscription_params.page,
+        subscription_params.limit,
+        subscription_params.count,
+    )
 
 
 @check_session_view("POST")
@@ -21,6 +92,11 @@ def create_subscription(request: HttpRequest) -> Union[JsonResponse, JsonRespons
     """
     Handles the creation of a subscription for an event.
 
+    Takes one of the seats of the event in a single statement (see
+    events.subscriptions.subscribe), on a full event the subscription joins the waitlist
+    instead, with the status "Em espera", and gets a seat as soon as one frees up.
+    Subscribing again, e.g. a retried request, returns the existing subscription.
+
     Args:
         request (HttpRequest): The HTTP request object containing the subscription data in the body.
 
@@ -30,7 +106,6 @@ def create_subscription(request: HttpRequest) -> Union[JsonResponse, JsonRespons
     Raises:
         ValidationError: If the subscription data is invalid.
         JSONDecodeError: If the request body is not valid JSON.
-        Event.DoesNotExist: If the event specified in the subscription data does not exist.
 
     Example:
         Request:
@@ -53,7 +128,8 @@ def create_subscription(request: HttpRequest) -> Union[JsonResponse, JsonRespons
                 "event__start_at": "2022-01-01T12:00:00",
                 "event__is_active": true,
                 "created_at": "2022-01-01T12:00:00",
-                "updated_at": "2022-01-01T12:00:00"
+                "updated_at": "2022-01-01T12:00:00",
+                "status": "Criado"
             }
         }
         ```
@@ -79,9 +155,8 @@ def create_subscription(request: HttpRequest) -> Union[JsonResponse, JsonRespons
                 "error": error,
             }
         )
-    try:
-        event = Event.objects.get(uid=payload.event_uid)
-    except Event.DoesNotExist:
+    subscription = subscribe(request.user, payload.event_uid)
+    if subscription is None:
         return JsonResponseBadRequest(
             content={
                 "success": False,
@@ -95,7 +170,7 @@ def create_subscription(request: HttpRequest) -> Union[JsonResponse, JsonRespons
             }
         )
 
-    if not event.is_active:
+    if subscription["uid"] is None:
         return JsonResponseBadRequest(
             content={
                 "success": False,
@@ -109,30 +184,32 @@ def create_subscription(request: HttpRequest) -> Union[JsonResponse, JsonRespons
             }
         )
 
-    subscription = Subscription.objects.create(
-        user=request.user,
-        event=event,
-    )
-
-    SubscriptionStatus.objects.create(
-        subscription=subscription,
-        status=TypeSubscriptionStatus.CREATED,
-    )
+    if not subscription.pop("created"):
+        msg = "Inscrição já existente"
+    elif subscription["status"] == TRANSLATED_SUBSCRIPTION_STATUS[TypeSubscriptionStatus.WAITLISTED]:
+        msg = "Inscrição na lista de espera"
+    else:
+        msg = "Inscrição criada com sucesso"
 
     return JsonResponse(
         content={
             "success": True,
-            "msg": "Inscrição criada com sucesso",
-            "data": subscription.model_dump(),
+            "msg": msg,
+            "data": subscription,
         }
     )
 
 
 @check_session_view("GET")
+@conditional_view(_list_subscription_validators)
 def list_subscription(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequest]:
     """
     Handles the listing of subscriptions based on the provided request parameters.
 
+    Sends an ETag built from the list generation of list_events, which every change of a
+    subscription or of its event bumps, so a matching If-None-Match is answered with a
+    304 after a single Redis read.
+
     Args:
         request (HttpRequest): The HTTP request object containing query parameters.
 
@@ -157,6 +234,7 @@ def list_subscription(request: HttpRequest) -> Union[JsonResponse, JsonResponseB
             "next_page": null,
             "num_pages": 1,
             "total": 1,
+            "count_strategy": "exact",
             "data": [
                 {
                 "uid": "1efe9a37-3b55-4757-8437-5197bf090671",
@@ -172,9 +250,17 @@ def list_subscription(request: HttpRequest) -> Union[JsonResponse, JsonResponseB
             ]
         }
         ```
+
+        With `pagination=cursor` (or a `cursor` param) the response carries
+        `previous_cursor`/`next_cursor` instead of page numbers and totals, see list_events.
+
+        With `format=ndjson` every matching subscription is streamed as NDJSON through a
+        server-side cursor, see list_events.
+
+        `fields=` keeps only the listed keys of each subscription (any of
+        FIELDS_BY_SUBSCRIPTION_LIST), see list_events.
     """
     try:
-
         subscription_params = SubscriptionParams(**request.GET.dict())
     except ValidationError as e:
         error = [
@@ -191,43 +277,59 @@ def list_subscription(request: HttpRequest) -> Union[JsonResponse, JsonResponseB
                 "error": error,
             }
         )
-    latest_status_subquery = (
-        SubscriptionStatus.objects.filter(subscription=OuterRef("pk"))
-        .order_by("-created_at")
-        .annotate(
-            translated_status=Case(
-                When(status=TypeSubscriptionStatus.CREATED, then=Value("Criado")),
-                When(status=TypeSubscriptionStatus.CONFIRMED, then=Value("Confirmado")),
-                When(status=TypeSubscriptionStatus.CANCELED, then=Value("Cancelado")),
-                When(status=TypeSubscriptionStatus.UNSIGNED, then=Value("Desinscrito")),
-                default=Value("Desconhecido"),
-                output_field=CharField(),
-            )
-        )
-        .values("translated_status")[:1]
-    )
+    subscriptions = _subscriptions_queryset(subscription_params)
+
+    if subscription_params.format == "ndjson":
+        # Bind the database now, the rows are read once the view (and the replica routing) returned
+        subscriptions = subscriptions.using(subscriptions.db)
+        return NDJsonStreamingResponse(subscriptions.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+
+    return JsonResponse(content=_paginate_subscriptions(subscriptions, subscription_params))
 
-    subscriptions = (
-        Subscription.objects.select_related("event")
-        .prefetch_related("subscription_statuses")
-        .filter(subscription_params.params)
-        .values(*FIELDS_BY_SUBSCRIPTION_MODEL_DUMP)
-        .annotate(
-            status=Subquery(latest_status_subquery),
+
+@check_session_view("GET")
+@conditional_view(_list_subscription_validators)
+async def alist_subscription(request: HttpRequest) -> Union[JsonResponse, JsonResponseBadRequest]:
+    """
+    Async version of list_subscription, served by core.asgi, see alist_events.
+    """
+    try:
+        subscription_params = SubscriptionParams(**request.GET.dict())
+    except ValidationError as e:
+        error = [
+            {
+                "loc": x["loc"],
+                "msg": x["msg"],
+                "type": x["type"],
+            }
+            for x in e.errors()
+        ]
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": error,
+            }
         )
-        .order_by(subscription_params.order_by)
-    )
 
-    data = generate_pagination_by_models(subscriptions, subscription_params.page, subscription_params.limit)
+    subscriptions = _subscriptions_queryset(subscription_params)
 
-    return JsonResponse(content=data)
+    if subscription_params.format == "ndjson":
+        # Bind the database now, the rows are read once the view (and the replica routing) returned
+        subscriptions = subscriptions.using(subscriptions.db)
+        return NDJsonStreamingResponse(subscriptions.aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+
+    return JsonResponse(content=await sync_to_async(_paginate_subscriptions)(subscriptions, subscription_params))
 
 
 @check_session_view("GET")
+@conditional_view(_detail_subscription_validators)
 def detail_subscription(request: HttpRequest, subscription_uid: UUID) -> Union[JsonResponse, JsonResponseBadRequest]:
     """
     Retrieve the details of a subscription for the authenticated user.
 
+    Sends ETag and Last-Modified from the updated_at of the subscription and of its
+    event, a matching conditional request is answered with a 304 after that lookup.
+
     Args:
         request (HttpRequest): The HTTP request object containing user information.
         subscription_uid (UUID): The unique identifier of the subscription.
@@ -261,9 +363,8 @@ def detail_subscription(request: HttpRequest, subscription_uid: UUID) -> Union[J
         }
         ```
     """
-    try:
-        subscription = Subscription.objects.get(uid=subscription_uid, user=request.user)
-    except Subscription.DoesNotExist:
+    subscription = SUBSCRIPTION_SHAPE.fetch(Subscription.objects.filter(uid=subscription_uid, user=request.user))
+    if subscription is None:
         return JsonResponseBadRequest(
             content={
                 "success": False,
@@ -280,7 +381,40 @@ def detail_subscription(request: HttpRequest, subscription_uid: UUID) -> Union[J
     return JsonResponse(
         content={
             "success": True,
-            "data": subscription.model_dump(),
+            "data": subscription,
+        }
+    )
+
+
+@check_session_view("GET")
+@conditional_view(_detail_subscription_validators)
+async def adetail_subscription(
+    request: HttpRequest, subscription_uid: UUID
+) -> Union[JsonResponse, JsonResponseBadRequest]:
+    """
+    Async version of detail_subscription, served by core.asgi.
+    """
+    subscription = await SUBSCRIPTION_SHAPE.afetch(
+        Subscription.objects.filter(uid=subscription_uid, user=request.user)
+    )
+    if subscription is None:
+        return JsonResponseBadRequest(
+            content={
+                "success": False,
+                "error": [
+                    {
+                        "loc": "subscription_uid",
+                        "msg": "Inscrição não encontrada",
+                        "type": "not_found",
+                    }
+                ],
+            }
+        )
+
+    return JsonResponse(
+        content={
+            "success": True,
+            "data": subscription,
         }
     )
 
@@ -290,6 +424,9 @@ def unsigned_subscription(request: HttpRequest, subscription_uid: UUID) -> Union
     """
     Handle the unsubscription of a user from an event.
 
+    The seat given back goes to the first subscription of the waitlist, see
+    events.subscriptions.promote_waitlist.
+
     Args:
         request (HttpRequest): The HTTP request object containing user information.
         subscription_uid (UUID): The unique identifier of the subscription.
@@ -330,8 +467,7 @@ def unsigned_subscription(request: HttpRequest, subscription_uid: UUID) -> Union
             }
         )
 
-    status = subscription.subscription_statuses.last()
-    if status.status == TypeSubscriptionStatus.UNSIGNED:
+    if not unsubscribe(subscription):
         return JsonResponseBadRequest(
             content={
                 "success": False,
@@ -345,11 +481,6 @@ def unsigned_subscription(request: HttpRequest, subscription_uid: UUID) -> Union
             }
         )
 
-    SubscriptionStatus.objects.create(
-        subscription=subscription,
-        status=TypeSubscriptionStatus.UNSIGNED,
-    )
-
     return JsonResponse(
         content={
             "success": True,
@@ -0,0 +1,99 @@
+WITH event AS (
+    SELECT
+        ee.id,
+        ee.title,
+        ee.description,
+        ee.start_at,
+        ee.is_active
+    FROM
+        events_event ee
+    WHERE
+        ee.uid = %(event_uid)s
+),
+inserted AS (
+    INSERT INTO events_subscription (uid, user_id, event_id, current_status, created_at, updated_at)
+    SELECT
+        gen_random_uuid(),
+        %(user_id)s,
+        event.id,
+        %(created)s,
+        statement_timestamp(),
+        statement_timestamp()
+    FROM
+        event
+    WHERE
+        event.is_active
+    ON CONFLICT (user_id, event_id) DO NOTHING
+    RETURNING
+        id,
+        uid,
+        event_id,
+        created_at,
+        updated_at
+),
+seat AS (
+    UPDATE events_event ee
+    SET seats_taken = ee.seats_taken + 1
+    FROM
+        inserted
+    WHERE
+        ee.id = inserted.event_id
+        AND (ee.capacity IS NULL OR ee.seats_taken < ee.capacity)
+        AND NOT EXISTS (
+            SELECT 1
+            FROM events_subscription es
+            WHERE es.event_id = ee.id AND es.current_status = %(waitlisted)s
+        )
+    RETURNING
+        ee.id
+),
+status AS (
+    INSERT INTO events_subscriptionstatus (subscription_id, status, created_at, updated_at)
+    SELECT
+        inserted.id,
+        CASE WHEN EXISTS (SELECT 1 FROM seat) THEN %(created)s ELSE %(waitlisted)s END,
+        inserted.created_at,
+        inserted.created_at
+    FROM
+        inserted
+    RETURNING
+        status
+),
+subscription AS (
+    SELECT
+        inserted.uid,
+        inserted.created_at,
+        inserted.updated_at,
+        status.status,
+        TRUE AS created
+    FROM
+        inserted,
+        status
+    UNION ALL
+    SELECT
+        es.uid,
+        es.created_at,
+        es.updated_at,
+        es.current_status,
+        FALSE
+    FROM
+        events_subscription es,
+        event
+    WHERE
+        es.user_id = %(user_id)s
+        AND es.event_id = event.id
+        AND event.is_active
+)
+SELECT
+    subscription.uid,
+    event.title AS event__title,
+    event.description AS event__description,
+    event.start_at AS event__start_at,
+    event.is_active AS event__is_active,
+    subscription.created_at,
+    subscription.updated_at,
+    subscription.status,
+    subscription.created
+FROM
+    event
+    LEFT JOIN subscription ON TRUE;
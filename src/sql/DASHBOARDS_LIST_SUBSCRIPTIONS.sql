@@ -0,0 +1,41 @@
+COALESCE(
+    (
+        SELECT
+            JSONB_AGG(
+                JSONB_BUILD_OBJECT(
+                    'uid', recent.uid,
+                    'email', au.email,
+                    'status',
+                    CASE
+                        WHEN recent.current_status = 1 THEN 'Criado'
+                        WHEN recent.current_status = 2 THEN 'Confirmado'
+                        WHEN recent.current_status = 3 THEN 'Cancelado'
+                        WHEN recent.current_status = 4 THEN 'Desinscrito'
+                        WHEN recent.current_status = 5 THEN 'Em espera'
+                        ELSE 'Desconhecido'
+                    END
+                )
+                ORDER BY recent.created_at DESC, recent.id DESC
+            )
+        FROM
+            (
+                SELECT
+                    es.id,
+                    es.uid,
+                    es.user_id,
+                    es.current_status,
+                    es.created_at
+                FROM
+                    events_subscription es
+                WHERE
+                    es.event_id = ee.id
+                ORDER BY
+                    es.created_at DESC,
+                    es.id DESC
+                LIMIT {limit}
+            ) recent
+        INNER JOIN
+            accounts_user au ON recent.user_id = au.id
+    ),
+    '[]'::jsonb
+)
@@ -0,0 +1,11 @@
+COALESCE(
+    (
+        SELECT
+            esc.created + esc.confirmed + esc.canceled + esc.unsigned + esc.waitlisted
+        FROM
+            events_eventsubscriptioncounts esc
+        WHERE
+            esc.event_id = ee.id
+    ),
+    0
+)
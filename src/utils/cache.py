@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import Any, Callable, Hashable, Optional
+
+from django.core.cache import cache
+
+from utils import metrics
+
+
+class LocalTTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after a TTL.
+
+    It sits in front of Redis for the hottest keys, so a warm lookup costs no
+    network round trip at all. Entries are local to the worker process, keep the
+    TTL short when other processes may invalidate the same keys.
+
+    Args:
+        maxsize (int): Maximum number of entries kept before evicting the least recently used.
+        ttl (float): Seconds an entry stays valid.
+
+    Example:
+        >>> cache = LocalTTLCache(maxsize=2, ttl=5)
+        >>> cache.set("a", 1)
+        >>> cache.get("a")
+        1
+    """
+
+    _missing = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, self._missing)
+            if entry is self._missing:
+                return default
+
+            expire_at, value = entry
+            if expire_at < monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def get_or_set_locked(
+    key: str,
+    loader: Callable[[], Any],
+    ttl: int,
+    stale_ttl: int = 0,
+    group: str = "cache",
+    lock_ttl: int = 10,
+    wait: float = 0.05,
+    retries: int = 20,
+) -> Any:
+    """
+    Reads a value from Redis, computing it with ``loader`` on a miss while protecting
+    the database against stampedes when a hot key expires.
+
+    Entries stay ``stale_ttl`` seconds past their ``ttl``: once stale, a single caller
+    takes a short lock and refreshes the value while the others keep serving the stale
+    one. On a cold miss the callers that lose the lock wait for the winner instead of
+    all hitting the database, and stop waiting as soon as the winner releases the lock
+    without storing anything (e.g. the loader returned None for a missing row).
+
+    When Redis is unavailable ``cache.add`` returns None instead of a bool (the client
+    ignores the exception): there is no lock to wait for, so the value is loaded directly.
+
+    Args:
+        key (str): The cache key.
+        loader (Callable): Computes the value, returning None means "do not cache".
+        ttl (int): Seconds the value is fresh.
+        stale_ttl (int, optional): Seconds a stale value can still be served while it is refreshed.
+        group (str, optional): Metrics group of the hit/miss counters.
+        lock_ttl (int, optional): Seconds the refresh lock is held at most.
+        wait (float, optional): Seconds between two reads while waiting for another caller.
+        retries (int, optional): Reads done while waiting before computing the value anyway.
+
+    Returns:
+        Any: The cached or computed value.
+    """
+    lock_key = f"{key}:lock"
+
+    def refresh():
+        try:
+            value = loader()
+            if value is not None:
+                cache.set(key, (value, time() + ttl), ttl + stale_ttl)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        # Another caller refreshes it, or nothing could store the refreshed value anyway
+        if fresh_until >= time() or not cache.add(lock_key, 1, lock_ttl):
+            metrics.incr(f"{group}.hits")
+            return value
+
+        metrics.incr(f"{group}.refreshes")
+        return refresh()
+
+    metrics.incr(f"{group}.misses")
+    locked = cache.add(lock_key, 1, lock_ttl)
+    if locked is None:
+        return loader()
+    if locked:
+        return refresh()
+
+    for _ in range(retries):
+        sleep(wait)
+        entries = cache.get_many([key, lock_key])
+        if key in entries:
+            return entries[key][0]
+        if lock_key not in entries:
+            break
+
+    return loader()
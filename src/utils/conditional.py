@@ -0,0 +1,84 @@
+from datetime import datetime
+from functools import wraps
+from hashlib import sha1
+from typing import Callable, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+Validators = Tuple[Optional[str], Optional[datetime]]
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds an ETag from the values that identify a version of a response.
+
+    Args:
+        *parts: Values whose change must change the ETag, e.g. ids, timestamps, counts.
+
+    Returns:
+        str: The hex digest of the parts.
+
+    Example:
+        etag = make_etag("events", last_updated_at, total)
+    """
+    return sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def conditional_view(validators: Callable[..., Optional[Validators]]) -> callable:
+    """
+    Decorator that answers If-None-Match/If-Modified-Since with a 304 before the view runs.
+
+    ``validators`` receives the same arguments as the view and must be cheap, it runs on
+    every request and only once: it returns the ETag and the Last-Modified date of the
+    response (either may be None), or None when the view will not return a body, e.g.
+    invalid params or a missing object. Must be applied below check_session_view, the
+    validators usually depend on request.user. Async views are supported, the validators
+    then run in a worker thread: the one of the authentication, through the ``prepare``
+    attribute of the wrapper read by check_session_view.
+
+    Args:
+        validators (Callable): Computes (etag, last_modified) for a request.
+
+    Returns:
+        callable: The decorated view function, which also sends ETag and Last-Modified.
+
+    Example:
+        @check_session_view("GET")
+        @conditional_view(lambda request: (make_etag(request.user.id), None))
+        def my_view(request):
+            ...
+    """
+
+    def get_validators(request, *args, **kwargs) -> Validators:
+        if not hasattr(request, "validators"):
+            request.validators = validators(request, *args, **kwargs) or (None, None)
+        return request.validators
+
+    def etag_func(request, *args, **kwargs) -> Optional[str]:
+        return get_validators(request, *args, **kwargs)[0]
+
+    def last_modified_func(request, *args, **kwargs) -> Optional[datetime]:
+        last_modified = get_validators(request, *args, **kwargs)[1]
+        # With USE_TZ = False the database returns local naive datetimes, condition() would read them as UTC
+        if last_modified is not None and timezone.is_naive(last_modified):
+            last_modified = timezone.make_aware(last_modified)
+        return last_modified
+
+    def decorator(view):
+        conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+        if not iscoroutinefunction(view):
+            return conditional
+
+        # condition() calls the validators synchronously, resolve them in a worker thread first
+        async def wrapper(request, *args, **kwargs):
+            if not hasattr(request, "validators"):
+                await sync_to_async(get_validators)(request, *args, **kwargs)
+            return await conditional(request, *args, **kwargs)
+
+        wrapper = wraps(view)(wrapper)
+        wrapper.prepare = get_validators
+        return wrapper
+
+    return decorator
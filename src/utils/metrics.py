@@ -0,0 +1,75 @@
+from collections import defaultdict
+from os import getpid
+from threading import Lock
+
+_lock = Lock()
+_counters = defaultdict(float)
+
+
+def incr(name: str, value: float = 1) -> None:
+    """
+    Increments an in-process counter.
+
+    Counters are kept per worker process, so every granian/celery worker reports
+    its own numbers.
+
+    Args:
+        name (str): Dotted name of the counter, e.g. "auth.session.local_hits".
+        value (float, optional): Amount to add. Defaults to 1.
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot() -> dict:
+    """
+    Returns the current counters grouped by their prefix.
+
+    Groups that expose "hits" and "misses" also get a derived "hit_rate", groups that
+    expose "bytes_in" and "bytes_out" a derived "ratio".
+
+    Returns:
+        dict: The counters of this process.
+
+    Example:
+        >>> snapshot()
+        {
+            "pid": 42,
+            "metrics": {
+                "auth.session": {
+                    "local_hits": 10,
+                    "redis_hits": 2,
+                    "misses": 1,
+                    "hits": 12,
+                    "hit_rate": 0.923
+                }
+            }
+        }
+    """
+    with _lock:
+        counters = dict(_counters)
+
+    groups = defaultdict(dict)
+    for name, value in counters.items():
+        group, _, key = name.rpartition(".")
+        groups[group][key] = int(value) if float(value).is_integer() else round(value, 3)
+
+    for values in groups.values():
+        hits = sum(value for key, value in values.items() if key.endswith("hits"))
+        misses = values.get("misses", 0)
+        if hits or misses:
+            values["hits"] = hits
+            values["hit_rate"] = round(hits / (hits + misses), 3)
+
+        if values.get("bytes_in"):
+            values["ratio"] = round(values.get("bytes_out", 0) / values["bytes_in"], 3)
+
+    return {"pid": getpid(), "metrics": dict(groups)}
+
+
+def reset() -> None:
+    """
+    Clears every counter of this process.
+    """
+    with _lock:
+        _counters.clear()
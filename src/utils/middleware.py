@@ -0,0 +1,174 @@
+import gzip
+import re
+from threading import local
+from time import thread_time_ns
+from typing import Callable, Dict, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from utils import metrics
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+_accept_encoding_re = re.compile(r"\s*([a-z0-9*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
+
+def _gzip(content: bytes) -> bytes:
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+_zstd = local()
+
+
+def _zstd_compress(content: bytes) -> bytes:
+    # A ZstdCompressor must not be used by two threads at once, the async path compresses
+    # in the thread pool of asgiref
+    compressor = getattr(_zstd, "compressor", None)
+    if compressor is None:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL)
+    return compressor.compress(content)
+
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    compressors = {}
+    if zstandard is not None:
+        compressors["zstd"] = _zstd_compress
+    if brotli is not None:
+        compressors["br"] = lambda content: brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressors["gzip"] = _gzip
+    return compressors
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """
+    Parses an Accept-Encoding header.
+
+    Args:
+        header (str): The value of the header, e.g. "gzip, br;q=0.9, zstd;q=0".
+
+    Returns:
+        Dict[str, float]: The quality of every listed encoding, "*" included.
+    """
+    encodings = {}
+    for part in header.lower().split(","):
+        match = _accept_encoding_re.match(part)
+        if not match or not match.group(1):
+            continue
+        try:
+            encodings[match.group(1)] = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+    return encodings
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON responses larger than COMPRESSION_MIN_SIZE bytes.
+
+    The encoding is negotiated with Accept-Encoding following COMPRESSION_ENCODINGS,
+    zstd and br are only offered when zstandard/brotli are installed, gzip always is.
+    Streaming responses (NDJSON exports, file downloads) are left untouched.
+
+    Every response is counted in the "compression" metrics group, with the bytes before
+    and after and the CPU time spent per encoding, see dashboards.views.metrics.
+
+    Sync and async capable: under ASGI the async views are not adapted through a thread.
+    There, bodies of COMPRESSION_OFFLOAD_SIZE bytes or more are compressed in the thread
+    pool instead of blocking the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.compressors = _compressors()
+        self.encodings = [encoding for encoding in settings.COMPRESSION_ENCODINGS if encoding in self.compressors]
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def negotiate(self, request: HttpRequest) -> Optional[str]:
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        for encoding in self.encodings:
+            if accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return None
+
+    def select_encoding(self, request: HttpRequest, response: HttpResponse) -> Optional[str]:
+        """
+        Returns the encoding to compress the response with, None leaves it as is.
+        """
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith("application/json")
+        ):
+            return None
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            metrics.incr("compression.skipped_small")
+            return None
+
+        encoding = self.negotiate(request)
+        if encoding is None:
+            metrics.incr("compression.skipped_unsupported")
+        return encoding
+
+    def compress(self, response: HttpResponse, encoding: str) -> None:
+        size = len(response.content)
+        started_at = thread_time_ns()
+        content = self.compressors[encoding](response.content)
+        cpu_us = (thread_time_ns() - started_at) / 1000
+
+        metrics.incr(f"compression.{encoding}.responses")
+        metrics.incr(f"compression.{encoding}.bytes_in", size)
+        metrics.incr(f"compression.{encoding}.bytes_out", len(content))
+        metrics.incr(f"compression.{encoding}.cpu_us", cpu_us)
+
+        if len(content) >= size:
+            return
+
+        response.content = content
+        response.headers["Content-Length"] = str(len(content))
+        response.headers["Content-Encoding"] = encoding
+
+        # As django.middleware.gzip does: the encoded body is a different representation
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        encoding = self.select_encoding(request, response)
+        if encoding is not None:
+            self.compress(response, encoding)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        response = await self.get_response(request)
+        encoding = self.select_encoding(request, response)
+        if encoding is None:
+            return response
+
+        if len(response.content) >= settings.COMPRESSION_OFFLOAD_SIZE:
+            await sync_to_async(self.compress, thread_sensitive=False)(response, encoding)
+        else:
+            self.compress(response, encoding)
+        return response
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import connections, models
 from django.db.models.functions import Now
 from django.db.models.expressions import Func
 from django.db.models.fields import UUIDField
@@ -93,3 +93,29 @@ def dict_fetchall(cursor):
     """
     columns = [col[0] for col in cursor.description]
     return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def pool_stats() -> dict:
+    """
+    Return the counters of the psycopg connection pools of this process.
+
+    Besides the raw counters of psycopg_pool (requests_num, requests_wait_ms,
+    connections_num, pool_available, ...) every pool gets the average time a request
+    waited for a connection and the average time spent opening one.
+
+    Returns:
+        dict: The counters of every pooled database alias.
+    """
+    stats = {}
+    for connection in connections.all():
+        if not connection.settings_dict["OPTIONS"].get("pool"):
+            continue
+
+        values = connection.pool.get_stats()
+        requests = values.get("requests_num", 0)
+        opened = values.get("connections_num", 0)
+        values["avg_wait_ms"] = round(values.get("requests_wait_ms", 0) / requests, 3) if requests else 0
+        values["avg_connect_ms"] = round(values.get("connections_ms", 0) / opened, 3) if opened else 0
+        stats[connection.alias] = values
+
+    return stats
@@ -1,7 +1,66 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from hashlib import sha1
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import F, Q
+from orjson import dumps, loads, JSONDecodeError
+
+from utils import metrics
+
+COUNT_STRATEGIES = ("exact", "cached", "estimate", "none")
+
+
+def count_queryset(queryset, strategy: str = "exact") -> Tuple[Optional[int], str]:
+    """
+    Counts the rows of a queryset with the given strategy.
+
+    Strategies:
+        - exact: a plain COUNT.
+        - cached: an exact COUNT cached for PAGINATION_COUNT_CACHE_TTL seconds, keyed by the
+          normalized SQL of the filtered queryset.
+        - estimate: the planner row estimate (EXPLAIN), falls back to an exact COUNT below
+          PAGINATION_ESTIMATE_THRESHOLD rows where counting is cheap.
+        - none: no count at all.
 
+    Args:
+        queryset: The queryset to count.
+        strategy (str): One of COUNT_STRATEGIES.
 
-def generate_pagination_by_models(serializer, page_number, page_size=3):
+    Returns:
+        Tuple[Optional[int], str]: The total and the strategy actually used.
+    """
+    queryset = queryset.order_by()
+
+    if strategy == "none":
+        return None, "none"
+
+    if strategy == "cached":
+        sql, params = queryset.query.sql_with_params()
+        key = f"pagination:count:{sha1(f'{sql}{params!r}'.encode()).hexdigest()}"
+        total = cache.get(key)
+        if total is not None:
+            metrics.incr("pagination.count.hits")
+            return total, "cached"
+
+        metrics.incr("pagination.count.misses")
+        total = queryset.count()
+        cache.set(key, total, settings.PAGINATION_COUNT_CACHE_TTL)
+        return total, "cached"
+
+    if strategy == "estimate":
+        plan = loads(queryset.explain(format="json"))
+        total = int(plan[0]["Plan"]["Plan Rows"])
+        if total >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+            return total, "estimate"
+
+    return queryset.count(), "exact"
+
+
+def generate_pagination_by_models(serializer, page_number, page_size=3, count="exact"):
     """
     Generates pagination data for a given serializer and page number.
 
@@ -9,13 +68,16 @@ def generate_pagination_by_models(serializer, page_number, page_size=3):
         serializer: The serializer containing the data to paginate.
         page_number (int): The current page number to retrieve.
         page_size (int): The number of objects to display per page.
+        count (str): How the total is computed, one of COUNT_STRATEGIES (see count_queryset).
 
     Returns:
         dict: A dictionary containing pagination information:
             - success (bool): Indicates if the pagination was successful.
             - previous_page (int or None): The previous page number, or None if there is no previous page.
             - next_page (int or None): The next page number, or None if there is no next page.
-            - num_pages (int or None): The total number of pages, or None if there are no pages.
+            - num_pages (int or None): The total number of pages, or None if there are no pages or no count.
+            - total (int or None): The total of objects, or None when the strategy is "none".
+            - count_strategy (str): The strategy used to compute the total.
             - data (list): A list of objects for the current page.
 
     Example:
@@ -27,6 +89,7 @@ def generate_pagination_by_models(serializer, page_number, page_size=3):
             "next_page": 2,
             "num_pages": 3,
             "total": 10,
+            "count_strategy": "exact",
             "data": [
                 {
                     "id": 1,
@@ -37,7 +100,25 @@ def generate_pagination_by_models(serializer, page_number, page_size=3):
             ]
         }
     """
+    total, count = count_queryset(serializer, count)
+
+    if total is None:
+        offset = (page_number - 1) * page_size
+        objects = list(serializer[offset : offset + page_size + 1])
+        has_next = len(objects) > page_size
+
+        return {
+            "success": True,
+            "previous_page": page_number - 1 or None,
+            "next_page": page_number + 1 if has_next else None,
+            "num_pages": None,
+            "total": None,
+            "count_strategy": count,
+            "data": objects[:page_size],
+        }
+
     paginator = Paginator(serializer, page_size)
+    paginator.count = total
 
     num_pages = paginator.num_pages
     try:
@@ -53,32 +134,55 @@ def generate_pagination_by_models(serializer, page_number, page_size=3):
         "next_page": objects.has_next() and objects.next_page_number() or None,
         "num_pages": num_pages or None,
         "total": paginator.count,
+        "count_strategy": count,
         "data": list(objects),
     }
 
 
-def generate_pagination_by_sql(queryset, page_number, page_size=3):
+def generate_pagination_by_sql(queryset, page_number, page_size=3, total=None, count="exact"):
     """
     Generates pagination data for a given queryset and page number.
 
     Args:
-        queryset: The queryset containing the data to paginate.
+        queryset: The rows fetched for the current page. With the "none" strategy one
+                  extra row is expected to tell whether there is a next page.
         page_number (int): The current page number to retrieve.
         page_size (int): The number of objects to display per page.
+        total (int, optional): The total computed by count_queryset. Defaults to the
+                               "total" column of the rows.
+        count (str): The strategy used to compute the total.
 
     Returns:
         dict: A dictionary containing pagination information:
             - success (bool): Indicates if the pagination was successful.
             - previous_page (int or None): The previous page number, or None if there is no previous page.
             - next_page (int or None): The next page number, or None if there is no next page.
-            - num_pages (int or None): The total number of pages, or None if there are no pages.
+            - num_pages (int or None): The total number of pages, or None if there are no pages or no count.
+            - total (int or None): The total of objects, or None when the strategy is "none".
+            - count_strategy (str): The strategy used to compute the total.
             - data (list): A list of objects for the current page.
 
     Example:
     """
 
-    if queryset:
-        total_pages = (queryset[0]["total"] + page_size - 1) // page_size
+    if count == "none":
+        has_next_page = len(queryset) > page_size
+
+        return {
+            "success": True,
+            "previous_page": page_number - 1 or None,
+            "next_page": page_number + 1 if has_next_page else None,
+            "num_pages": None,
+            "total": None,
+            "count_strategy": count,
+            "data": queryset[:page_size],
+        }
+
+    if total is None:
+        total = queryset[0]["total"] if queryset else 0
+
+    if total:
+        total_pages = (total + page_size - 1) // page_size
         has_next_page = page_number < total_pages
         has_previous_page = page_number > 1
         num_pages_range = total_pages
@@ -93,6 +197,121 @@ def generate_pagination_by_sql(queryset, page_number, page_size=3):
         "previous_page": page_number - 1 if has_previous_page else None,
         "next_page": page_number + 1 if has_next_page else None,
         "num_pages": num_pages_range,
-        "total": queryset[0]["total"] if queryset else 0,
+        "total": total,
+        "count_strategy": count,
         "data": queryset,
     }
+
+
+def encode_cursor(order_by: str, direction: str, position: list) -> str:
+    """
+    Encodes a keyset position into an opaque cursor.
+
+    Args:
+        order_by (str): The ordering the cursor belongs to, e.g. "-start_at".
+        direction (str): "next" or "prev".
+        position (list): The ordering value and the id of the boundary row.
+
+    Returns:
+        str: The url-safe cursor.
+    """
+    payload = dumps({"order_by": order_by, "direction": direction, "position": position})
+    return urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, order_by: str) -> dict:
+    """
+    Decodes a cursor created by encode_cursor.
+
+    Args:
+        cursor (str): The opaque cursor sent by the client.
+        order_by (str): The ordering of the current request.
+
+    Returns:
+        dict: The cursor payload.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another ordering.
+    """
+    try:
+        payload = loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        direction = payload["direction"]
+        value, pk = payload["position"]
+    except (BinasciiError, JSONDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError("Cursor inválido")
+
+    if direction not in ("next", "prev") or not isinstance(pk, int):
+        raise ValueError("Cursor inválido")
+
+    if payload["order_by"] != order_by:
+        raise ValueError("Cursor não corresponde à ordenação")
+
+    return payload
+
+
+def generate_pagination_by_cursor(queryset, order_by: str, cursor: Optional[str] = None, page_size=10):
+    """
+    Generates keyset (cursor) pagination data for a given queryset.
+
+    The page is located with a range condition on the ordering field plus the id as
+    tiebreaker, instead of COUNT and OFFSET, so every page costs the same as the first.
+
+    Args:
+        queryset: The values queryset to paginate.
+        order_by (str): The ordering field, prefixed with "-" for descending order.
+        cursor (str, optional): The cursor of the requested page, None for the first page.
+        page_size (int): The number of objects to display per page.
+
+    Returns:
+        dict: A dictionary containing pagination information:
+            - success (bool): Indicates if the pagination was successful.
+            - previous_cursor (str or None): The cursor of the previous page, or None if there is no previous page.
+            - next_cursor (str or None): The cursor of the next page, or None if there is no next page.
+            - data (list): A list of objects for the current page.
+
+    Example:
+        >>> generate_pagination_by_cursor(Event.objects.values("uid", "title"), "title", None, 2)
+        {
+            "success": True,
+            "previous_cursor": None,
+            "next_cursor": "eyJvcmRlcl9ieSI6InRpdGxlIiwiZGlyZWN0aW9uIjoibmV4dCIsInBvc2l0aW9uIjpbIkIiLDJdfQ",
+            "data": [
+                {"uid": "101dc542-6115-4ce9-b113-514411b7dc93", "title": "A"},
+                {"uid": "fbdbe5fe-3d3c-4ce4-8486-09796c5b1cfc", "title": "B"}
+            ]
+        }
+    """
+    field = order_by.lstrip("-")
+    descending = order_by.startswith("-")
+    payload = decode_cursor(cursor, order_by) if cursor else None
+    backwards = payload is not None and payload["direction"] == "prev"
+    scan_descending = descending != backwards
+
+    queryset = queryset.annotate(cursor_value=F(field), cursor_id=F("id"))
+    if payload is not None:
+        value, pk = payload["position"]
+        lookup = "lt" if scan_descending else "gt"
+        # The redundant bound is what an index on (field, id) can seek to, the OR alone
+        # is only a filter and would scan every row before the cursor
+        queryset = queryset.filter(**{f"{field}__{lookup}e": value}).filter(
+            Q(**{f"{field}__{lookup}": value}) | Q(**{field: value, f"id__{lookup}": pk})
+        )
+
+    prefix = "-" if scan_descending else ""
+    objects = list(queryset.order_by(f"{prefix}{field}", f"{prefix}id")[: page_size + 1])
+
+    has_more = len(objects) > page_size
+    objects = objects[:page_size]
+    if backwards:
+        objects.reverse()
+
+    positions = [[obj.pop("cursor_value"), obj.pop("cursor_id")] for obj in objects]
+    has_next = payload is not None if backwards else has_more
+    has_previous = has_more if backwards else payload is not None
+
+    return {
+        "success": True,
+        "previous_cursor": encode_cursor(order_by, "prev", positions[0]) if has_previous and positions else None,
+        "next_cursor": encode_cursor(order_by, "next", positions[-1]) if has_next and positions else None,
+        "data": objects,
+    }
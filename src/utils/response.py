@@ -1,5 +1,7 @@
-from django.http import HttpResponse, HttpResponseBadRequest
-from orjson import dumps
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Union
+
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from orjson import dumps, OPT_APPEND_NEWLINE
 
 
 class JsonResponseBadRequest(HttpResponseBadRequest):
@@ -40,6 +42,22 @@ class JsonResponse(HttpResponse):
         super().__init__(dumps(content), *args, **kwargs)
 
 
+class RawJsonResponse(HttpResponse):
+    """
+    An HTTP response for a body that is already serialized to JSON, e.g. read from the cache.
+
+    Args:
+        content (bytes): The JSON body.
+
+    Example:
+        response = RawJsonResponse(b'{"success":true}')
+    """
+
+    def __init__(self, content=b"{}", *args, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content, *args, **kwargs)
+
+
 class UnauthorizedResponse(HttpResponse):
     """
     Represents an HTTP response indicating that the request is unauthorized.
@@ -82,3 +100,57 @@ class NotAllowedResponse(HttpResponse):
             *args,
             **kwargs,
         )
+
+
+class NDJsonStreamingResponse(StreamingHttpResponse):
+    """
+    A streaming HTTP response that serializes each row to a line of NDJSON as it is consumed.
+
+    Rows are grouped in chunks of about ``buffer_size`` bytes, so the server does not issue
+    one write per row while the memory used stays bounded by the chunk.
+
+    Args:
+        rows (Union[Iterable, AsyncIterable]): The rows to be serialized, usually a generator or,
+            under ASGI, an async iterator such as ``queryset.aiterator()``.
+        buffer_size (int, optional): Bytes gathered before a chunk is sent.
+
+    Example:
+        response = NDJsonStreamingResponse({"line": n} for n in range(10))
+    """
+
+    def __init__(self, rows: Union[Iterable, AsyncIterable] = (), *args, buffer_size: int = 16 * 1024, **kwargs):
+        kwargs.setdefault("content_type", "application/x-ndjson")
+        chunks = self._achunks(rows, buffer_size) if hasattr(rows, "__aiter__") else self._chunks(rows, buffer_size)
+        super().__init__(chunks, *args, **kwargs)
+
+    @staticmethod
+    def _chunks(rows: Iterable, buffer_size: int) -> Iterator[bytes]:
+        chunk = []
+        size = 0
+        for row in rows:
+            line = dumps(row, option=OPT_APPEND_NEWLINE)
+            chunk.append(line)
+            size += len(line)
+            if size >= buffer_size:
+                yield b"".join(chunk)
+                chunk = []
+                size = 0
+
+        if chunk:
+            yield b"".join(chunk)
+
+    @staticmethod
+    async def _achunks(rows: AsyncIterable, buffer_size: int) -> AsyncIterator[bytes]:
+        chunk = []
+        size = 0
+        async for row in rows:
+            line = dumps(row, option=OPT_APPEND_NEWLINE)
+            chunk.append(line)
+            size += len(line)
+            if size >= buffer_size:
+                yield b"".join(chunk)
+                chunk = []
+                size = 0
+
+        if chunk:
+            yield b"".join(chunk)
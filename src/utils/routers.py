@@ -0,0 +1,168 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import sha1
+from typing import Iterator, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpRequest
+
+from utils import metrics
+
+PRIMARY = "default"
+STICKY_KEY_PREFIX = "db:sticky:"
+# A token issued a moment ago may not have reached the replicas yet
+PRIMARY_MODELS = {"sessions.session"}
+
+# Off by default: celery tasks, commands and writes always read from the primary, only
+# the read-only requests let through by ReplicaRoutingMiddleware use the replicas
+_replica_reads = ContextVar("replica_reads", default=False)
+# Models written during the current request, a write sends the following reads to the primary
+_request_writes: ContextVar[Optional[List]] = ContextVar("request_writes", default=None)
+
+
+@contextmanager
+def replica_reads(enabled: bool = True) -> Iterator[None]:
+    """
+    Lets (or stops) the reads of the block go to the replicas.
+
+    Use `replica_reads(False)` around reads whose result outlives the request, e.g. a
+    value put in a shared cache, which must not come from a lagging replica.
+
+    Args:
+        enabled (bool, optional): Whether reads may go to a replica. Defaults to True.
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def sticky_key(request: HttpRequest) -> Optional[str]:
+    """
+    Cache key marking the client of the request as "just wrote", built from its bearer
+    token so that it never shows up in Redis as is.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Optional[str]: The key, or None for anonymous requests.
+    """
+    http_auth = request.META.get("HTTP_AUTHORIZATION")
+    if not http_auth:
+        return None
+    return f"{STICKY_KEY_PREFIX}{sha1(http_auth.encode()).hexdigest()}"
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a random replica of DATABASE_REPLICAS and everything else to the
+    primary.
+
+    Reads only go to a replica inside `replica_reads()`, outside of a transaction on the
+    primary and before the request wrote anything, so a read following a write sees it.
+    """
+
+    def db_for_read(self, model, **hints) -> str:
+        if (
+            not settings.DATABASE_REPLICAS
+            or not _replica_reads.get()
+            or _request_writes.get()
+            or connections[PRIMARY].in_atomic_block
+            or model._meta.label_lower in PRIMARY_MODELS
+        ):
+            return PRIMARY
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints) -> str:
+        writes = _request_writes.get()
+        if writes is not None:
+            writes.append(model)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets GET/HEAD requests read from the replicas, unless the same client wrote
+    something less than DATABASE_STICKY_SECONDS ago: it then keeps reading from the
+    primary, so a `create_subscription` followed by `list_subscription` shows the new
+    row whatever the replication lag. Any request that writes (including the GET of
+    `unsigned_subscription`) starts that window.
+
+    Counted in the "db.router" metrics group, see dashboards.views.metrics.
+
+    Sync and async capable, so that it does not force the async views of core.asgi
+    through a thread. The routing state lives in context variables, which the views
+    run by sync_to_async inherit.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = sticky_key(request)
+        writes = []
+        token = _request_writes.set(writes)
+        try:
+            if request.method not in ("GET", "HEAD"):
+                response = self.get_response(request)
+            elif key is not None and cache.get(key):
+                metrics.incr("db.router.sticky_requests")
+                response = self.get_response(request)
+            else:
+                metrics.incr("db.router.replica_requests")
+                with replica_reads():
+                    response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+
+        if writes and key is not None and response.status_code < 400:
+            cache.set(key, 1, settings.DATABASE_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = sticky_key(request)
+        writes = []
+        token = _request_writes.set(writes)
+        try:
+            if request.method not in ("GET", "HEAD"):
+                response = await self.get_response(request)
+            elif key is not None and await cache.aget(key):
+                metrics.incr("db.router.sticky_requests")
+                response = await self.get_response(request)
+            else:
+                metrics.incr("db.router.replica_requests")
+                with replica_reads():
+                    response = await self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+
+        if writes and key is not None and response.status_code < 400:
+            await cache.aset(key, 1, settings.DATABASE_STICKY_SECONDS)
+        return response
@@ -0,0 +1,75 @@
+from typing import Any, Callable, Optional, Tuple, Union
+
+from django.db.models import Model, QuerySet
+
+Lookup = Union[str, Tuple[str, Callable[[Any], Any]]]
+
+
+class Shape:
+    """
+    Declares the output of an endpoint once, as response keys mapped to ORM lookups.
+
+    The same declaration serves both ways of building the response: ``fetch`` reads only
+    the declared columns, with the joins their lookups need, in a single query, and
+    ``dump`` serializes an instance already in memory without lazy loads as long as it
+    was read with ``select_related(*shape.related)``.
+
+    Args:
+        **fields: Response key to lookup, e.g. ``promoter="promoter__email"``, or to a tuple
+            of lookup and a function that converts the raw value.
+
+    Example:
+        >>> EVENT = Shape(uid="uid", promoter="promoter__email")
+        >>> EVENT.fetch(Event.objects.filter(uid=event_uid))
+        {"uid": UUID("123e4567-e89b-12d3-a456-426614174000"), "promoter": "aa@aa.com"}
+    """
+
+    def __init__(self, **fields: Lookup):
+        self.fields = {key: (lookup, None) if isinstance(lookup, str) else lookup for key, lookup in fields.items()}
+        self.lookups = tuple(lookup for lookup, _ in self.fields.values())
+        self.related = tuple(sorted({lookup.rsplit("__", 1)[0] for lookup in self.lookups if "__" in lookup}))
+
+    def _row(self, values) -> dict:
+        return {
+            key: convert(value) if convert is not None else value
+            for (key, (_, convert)), value in zip(self.fields.items(), values, strict=True)
+        }
+
+    def fetch(self, queryset: QuerySet) -> Optional[dict]:
+        """
+        Reads the first row of a queryset in the declared shape.
+
+        Args:
+            queryset (QuerySet): The filtered queryset.
+
+        Returns:
+            Optional[dict]: The row, or None if the queryset is empty.
+        """
+        values = queryset.order_by().values_list(*self.lookups)[:1]
+        return self._row(values[0]) if values else None
+
+    async def afetch(self, queryset: QuerySet) -> Optional[dict]:
+        """
+        Async version of fetch, built on the async ORM.
+        """
+        values = [row async for row in queryset.order_by().values_list(*self.lookups)[:1]]
+        return self._row(values[0]) if values else None
+
+    def dump(self, instance: Model) -> dict:
+        """
+        Serializes an instance in the declared shape.
+
+        Args:
+            instance (Model): The instance, with its related objects already loaded.
+
+        Returns:
+            dict: The serialized instance.
+        """
+        values = []
+        for lookup in self.lookups:
+            value = instance
+            for name in lookup.split("__"):
+                value = getattr(value, name)
+            values.append(value)
+
+        return self._row(values)
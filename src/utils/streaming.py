@@ -0,0 +1,173 @@
+import re
+from codecs import getincrementaldecoder
+from json import JSONDecodeError as ArrayDecodeError, JSONDecoder
+from typing import Any, AsyncIterator, BinaryIO, Iterator, Tuple
+
+from asgiref.sync import sync_to_async
+from orjson import loads, JSONDecodeError
+
+_decoder = JSONDecoder()
+_WHITESPACE = " \t\r\n"
+# Ends a number or literal, a decoding error followed by one of them is not a value cut by the chunk
+_TOKEN_END = re.compile(r'[\s,:\[\]{}"]')
+
+
+def _truncated(error: ArrayDecodeError, buffer: str) -> bool:
+    # Whether the value may continue in the next chunk, rather than being malformed
+    if error.msg.startswith("Unterminated string"):
+        return True
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        # The escape, or the low surrogate that may follow it, reaches the end of the buffer
+        return error.pos + len("uXXXX\\uXXXX") >= len(buffer)
+    return not _TOKEN_END.search(buffer, error.pos)
+
+
+def iter_ndjson(stream, max_line_size: int = 1024 * 1024) -> Iterator[Tuple[int, Any]]:
+    """
+    Parses a NDJSON stream one line at a time, without reading it whole.
+
+    Args:
+        stream: A file-like object opened in binary mode, e.g. the HttpRequest.
+        max_line_size (int, optional): Longest line accepted, longer lines are reported as errors.
+
+    Yields:
+        Tuple[int, Any]: The line number and the decoded value, or the JSONDecodeError/ValueError
+                         of an invalid line. Blank lines are skipped.
+
+    Example:
+        for line, row in iter_ndjson(request):
+            ...
+    """
+    line_number = 0
+    while True:
+        line = stream.readline(max_line_size + 1)
+        if not line:
+            return
+
+        line_number += 1
+        if len(line) > max_line_size and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line_size + 1)
+            yield line_number, ValueError(f"Linha maior que {max_line_size} bytes")
+            continue
+
+        if not line.strip():
+            continue
+
+        try:
+            yield line_number, loads(line)
+        except JSONDecodeError as e:
+            yield line_number, e
+
+
+def iter_json_array(stream, chunk_size: int = 64 * 1024) -> Iterator[Tuple[int, Any]]:
+    """
+    Parses the items of a top-level JSON array as they arrive, keeping in memory only the
+    items of the current chunk instead of the whole document.
+
+    Args:
+        stream: A file-like object opened in binary mode, e.g. the HttpRequest.
+        chunk_size (int, optional): Bytes read from the stream at a time.
+
+    Yields:
+        Tuple[int, Any]: The position of the item (starting at 1) and the decoded value. A
+                         malformed document yields a single ValueError and stops.
+
+    Example:
+        for position, row in iter_json_array(request):
+            ...
+    """
+    decoder = getincrementaldecoder("utf-8")()
+    buffer = ""
+    offset = 0
+    position = 0
+    eof = False
+
+    def read() -> bool:
+        nonlocal buffer, offset, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[offset:] + decoder.decode(chunk, final=eof)
+        offset = 0
+        return not eof
+
+    def skip_whitespace() -> bool:
+        nonlocal offset
+        while True:
+            while offset < len(buffer) and buffer[offset] in _WHITESPACE:
+                offset += 1
+            if offset < len(buffer):
+                return True
+            if not read():
+                return False
+
+    try:
+        if not skip_whitespace() or buffer[offset] != "[":
+            yield 1, ValueError("Esperado um array JSON")
+            return
+        offset += 1
+
+        if not skip_whitespace():
+            yield 1, ValueError("Documento JSON incompleto")
+            return
+        if buffer[offset] == "]":
+            return
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, offset)
+                # A value touching the end of the buffer may continue in the next chunk
+                complete = end < len(buffer) or eof
+            except ArrayDecodeError as e:
+                # A syntax error is reported right away, not after buffering the rest of the upload
+                if _truncated(e, buffer) and read():
+                    continue
+                yield position + 1, ValueError(e.msg)
+                return
+
+            if not complete:
+                read()
+                continue
+
+            position += 1
+            offset = end
+            yield position, value
+
+            if not skip_whitespace():
+                yield position + 1, ValueError("Documento JSON incompleto")
+                return
+            separator = buffer[offset]
+            offset += 1
+            if separator == "]":
+                return
+            if separator != "," or not skip_whitespace():
+                yield position + 1, ValueError("Esperado , ou ] entre os itens")
+                return
+    except UnicodeDecodeError as e:
+        yield position + 1, ValueError(str(e))
+
+
+async def aiter_file(file: BinaryIO, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Reads a file in chunks from a worker thread, so a response can stream it under ASGI
+    without blocking the event loop nor holding it whole in memory. The file is closed
+    once it is read or the iteration is abandoned.
+
+    Args:
+        file: A file-like object opened in binary mode.
+        chunk_size (int, optional): Bytes read at a time.
+
+    Yields:
+        bytes: The next chunk of the file.
+
+    Example:
+        response = StreamingHttpResponse(aiter_file(open(path, "rb")))
+    """
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while chunk := await read(chunk_size):
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()